@@ -31,6 +31,7 @@ if config.config_file_name is not None:
 # add your model's MetaData object here
 from db import Base
 from models import *  # 👈 ensures all models register on Base.metadata
+from services.partitions import is_partition
 target_metadata = Base.metadata
 
 
@@ -81,6 +82,9 @@ def run_migrations_online() -> None:
         # Skip PostGIS extension tables and views
         if type_ == "table" and name in {"spatial_ref_sys", "layer", "topology"}:
             return False
+        # Daily partitions are created at runtime, not declared in the models
+        if type_ == "table" and is_partition(name):
+            return False
         return True
 
     with connectable.connect() as connection:
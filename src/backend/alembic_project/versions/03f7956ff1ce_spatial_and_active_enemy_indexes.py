@@ -0,0 +1,47 @@
+"""Spatial indexes and a partial index on live enemies
+
+Revision ID: 03f7956ff1ce
+Revises: d35fc0a166d6
+Create Date: 2026-10-17 15:42:10.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '03f7956ff1ce'
+down_revision: Union[str, None] = 'd35fc0a166d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same names GeoAlchemy2 gives the spatial indexes it declares on create_all,
+# so databases that already have them are left alone
+SPATIAL_INDEXES = [
+    ('idx_places_bounding_box', 'places', 'bounding_box'),
+    ('idx_enemies_location', 'enemies', 'location'),
+    ('idx_location_history_location', 'location_history', 'location'),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction,
+    # but doesn't lock the tables against writes while it builds
+    with op.get_context().autocommit_block():
+        for name, table, column in SPATIAL_INDEXES:
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gist ({column})')
+
+        # A player's live enemies: every spawn, list and purge filters on these
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_enemies_user_active '
+            'ON enemies (user_id, expires_at) WHERE defeated = 0'
+        )
+
+
+def downgrade() -> None:
+    # The spatial indexes stay: the models declared them before this revision too
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_enemies_user_active')
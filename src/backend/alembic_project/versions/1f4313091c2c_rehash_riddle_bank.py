@@ -0,0 +1,56 @@
+"""Recompute riddle_bank.content_hash with the shared whitespace trimming
+
+Revision ID: 1f4313091c2c
+Revises: d196d56359c4
+Create Date: 2026-10-17 21:14:52.640197
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f4313091c2c'
+down_revision: Union[str, None] = 'd196d56359c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Same key as riddle_content_hash: tabs and newlines at either end are trimmed too
+    # (8978a466db63 backfilled with btrim(), which only trims spaces). Riddles that now
+    # share a hash are merged into the lowest id: enemies move over, the others go.
+    op.execute("""
+        CREATE TEMP TABLE riddle_rehash ON COMMIT DROP AS
+        SELECT id, h, min(id) OVER (PARTITION BY h) AS keep_id
+        FROM (
+            SELECT id, encode(sha256(convert_to(
+                       lower(btrim(riddle, E' \\t\\n\\r\\f\\x0b')) || E'\\n' || lower(btrim(answer, E' \\t\\n\\r\\f\\x0b')),
+                       'UTF8')), 'hex') AS h
+            FROM riddle_bank
+        ) AS hashed
+    """)
+    op.execute("""
+        UPDATE enemies e
+        SET riddle_id = r.keep_id
+        FROM riddle_rehash r
+        WHERE e.riddle_id = r.id AND r.id <> r.keep_id
+    """)
+    op.execute("""
+        DELETE FROM riddle_bank b
+        USING riddle_rehash r
+        WHERE b.id = r.id AND r.id <> r.keep_id
+    """)
+    op.execute("""
+        UPDATE riddle_bank b
+        SET content_hash = r.h
+        FROM riddle_rehash r
+        WHERE b.id = r.id AND b.content_hash <> r.h
+    """)
+
+
+def downgrade() -> None:
+    # The new hashes dedup at least as well as the old ones, and merged riddles can't be split again
+    pass
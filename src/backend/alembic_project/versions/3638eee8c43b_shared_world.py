@@ -0,0 +1,61 @@
+"""Shared world tiles, per-player defeats and spawn state
+
+Revision ID: 3638eee8c43b
+Revises: 03f7956ff1ce
+Create Date: 2026-10-17 17:08:31.540962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3638eee8c43b'
+down_revision: Union[str, None] = '03f7956ff1ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('enemies', sa.Column('tile_id', sa.String(), nullable=True))
+    op.add_column('enemies', sa.Column('epoch', sa.Integer(), nullable=True))
+    op.create_index('ix_enemies_tile_epoch', 'enemies', ['tile_id', 'epoch'], unique=False)
+
+    op.create_table(
+        'enemy_defeats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('enemy_id', sa.Integer(), nullable=False),
+        sa.Column('defeated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('user_id', 'enemy_id'),
+    )
+
+    op.create_table(
+        'world_tiles',
+        sa.Column('tile_id', sa.String(), nullable=False),
+        sa.Column('epoch', sa.Integer(), nullable=False),
+        sa.Column('spawned_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('tile_id', 'epoch'),
+    )
+
+    op.create_table(
+        'player_spawn_state',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('tile_id', sa.String(), nullable=True),
+        sa.Column('location', geoalchemy2.types.Geometry(geometry_type='POINT', srid=4326, spatial_index=False), nullable=True),
+        sa.Column('spawned_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('player_spawn_state')
+    op.drop_table('world_tiles')
+    op.drop_table('enemy_defeats')
+    op.drop_index('ix_enemies_tile_epoch', table_name='enemies')
+    op.drop_column('enemies', 'epoch')
+    op.drop_column('enemies', 'tile_id')
@@ -0,0 +1,123 @@
+"""Partition enemies and location_history by day
+
+Revision ID: 5c785d9a8c46
+Revises: acad841368f5
+Create Date: 2026-10-17 19:48:36.204118
+
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.partitions import PARTITION_DAYS_AHEAD, create_partition
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c785d9a8c46'
+down_revision: Union[str, None] = 'acad841368f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ENEMY_COLUMNS = "id, enemy_type, location, place_type, riddle_id, spawn_time, expires_at, defeated, user_id, tile_id, epoch"
+LOCATION_HISTORY_COLUMNS = "id, user_id, location, timestamp"
+
+
+def _create_daily_partitions(conn, table: str, key: str, source: str):
+    """Partitions from the oldest row in source up to PARTITION_DAYS_AHEAD days from now."""
+    today = datetime.now(timezone.utc).date()
+    oldest = conn.execute(sa.text(f"SELECT min({key}) FROM {source}")).scalar()
+    day = min(oldest.date(), today) - timedelta(days=1) if oldest else today  # a day early: local vs UTC dates
+    while day <= today + timedelta(days=PARTITION_DAYS_AHEAD):
+        create_partition(conn, table, day)
+        day += timedelta(days=1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # --- enemies, by spawn_time ---
+    # Keep the old table (and its id sequence) around until the rows are copied
+    op.execute('ALTER TABLE enemies RENAME TO enemies_unpartitioned')
+    op.execute('ALTER SEQUENCE enemies_id_seq OWNED BY NONE')
+    op.execute('UPDATE enemies_unpartitioned SET spawn_time = now() WHERE spawn_time IS NULL')
+    op.execute("""
+        CREATE TABLE enemies (
+            id INTEGER NOT NULL DEFAULT nextval('enemies_id_seq'),
+            enemy_type VARCHAR NOT NULL,
+            location geometry(POINT,4326) NOT NULL,
+            place_type VARCHAR,
+            riddle_id INTEGER,
+            spawn_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            defeated INTEGER,
+            user_id INTEGER,
+            tile_id VARCHAR,
+            epoch INTEGER
+        ) PARTITION BY RANGE (spawn_time)
+    """)
+    _create_daily_partitions(conn, 'enemies', 'spawn_time', 'enemies_unpartitioned')
+    op.execute(f'INSERT INTO enemies ({ENEMY_COLUMNS}) SELECT {ENEMY_COLUMNS} FROM enemies_unpartitioned')
+    op.execute('DROP TABLE enemies_unpartitioned')
+    op.execute('ALTER SEQUENCE enemies_id_seq OWNED BY enemies.id')
+
+    # Constraints and indexes go on the parent; PostgreSQL creates them on every partition
+    op.create_primary_key('enemies_pkey', 'enemies', ['id', 'spawn_time'])
+    op.create_foreign_key('enemies_riddle_id_fkey', 'enemies', 'riddle_bank', ['riddle_id'], ['id'])
+    op.create_foreign_key('enemies_user_id_fkey', 'enemies', 'users', ['user_id'], ['user_id'])
+    op.create_index('ix_enemies_id', 'enemies', ['id'], unique=False)
+    op.create_index('ix_enemies_spawn_time', 'enemies', ['spawn_time'], unique=False)
+    op.create_index('ix_enemies_tile_epoch', 'enemies', ['tile_id', 'epoch'], unique=False)
+    op.create_index('ix_enemies_user_active', 'enemies', ['user_id', 'expires_at'], unique=False,
+                    postgresql_where=sa.text('defeated = 0'))
+    op.execute('CREATE INDEX idx_enemies_location ON enemies USING gist (location)')
+
+    # --- location_history, by timestamp ---
+    op.execute('ALTER TABLE location_history RENAME TO location_history_unpartitioned')
+    op.execute('ALTER SEQUENCE location_history_id_seq OWNED BY NONE')
+    op.execute("UPDATE location_history_unpartitioned SET timestamp = now() AT TIME ZONE 'utc' WHERE timestamp IS NULL")
+    op.execute("""
+        CREATE TABLE location_history (
+            id INTEGER NOT NULL DEFAULT nextval('location_history_id_seq'),
+            user_id INTEGER,
+            location geography(POINT,4326),
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    _create_daily_partitions(conn, 'location_history', 'timestamp', 'location_history_unpartitioned')
+    op.execute(
+        f'INSERT INTO location_history ({LOCATION_HISTORY_COLUMNS}) '
+        f'SELECT {LOCATION_HISTORY_COLUMNS} FROM location_history_unpartitioned'
+    )
+    op.execute('DROP TABLE location_history_unpartitioned')
+    op.execute('ALTER SEQUENCE location_history_id_seq OWNED BY location_history.id')
+
+    op.create_primary_key('location_history_pkey', 'location_history', ['id', 'timestamp'])
+    op.create_foreign_key('location_history_user_id_fkey', 'location_history', 'users', ['user_id'], ['user_id'])
+    op.create_index('ix_location_history_id', 'location_history', ['id'], unique=False)
+    op.execute('CREATE INDEX idx_location_history_location ON location_history USING gist (location)')
+
+
+def downgrade() -> None:
+    # Back to plain tables, keeping the rows
+    for table, columns in (('enemies', ENEMY_COLUMNS), ('location_history', LOCATION_HISTORY_COLUMNS)):
+        op.execute(f'ALTER TABLE {table} RENAME TO {table}_partitioned')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+        op.execute(f'CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)')
+        op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_partitioned')
+        op.execute(f'DROP TABLE {table}_partitioned')  # drops the partitions too
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+        op.create_primary_key(f'{table}_pkey', table, ['id'])
+        op.create_index(f'ix_{table}_id', table, ['id'], unique=False)
+        op.execute(f'CREATE INDEX idx_{table}_location ON {table} USING gist (location)')
+        op.create_foreign_key(f'{table}_user_id_fkey', table, 'users', ['user_id'], ['user_id'])
+
+    op.alter_column('location_history', 'timestamp', existing_type=sa.DateTime(), nullable=True)
+    op.alter_column('enemies', 'spawn_time', existing_type=sa.DateTime(timezone=True), nullable=True)
+    op.create_foreign_key('enemies_riddle_id_fkey', 'enemies', 'riddle_bank', ['riddle_id'], ['id'])
+    op.create_index('ix_enemies_spawn_time', 'enemies', ['spawn_time'], unique=False)
+    op.create_index('ix_enemies_tile_epoch', 'enemies', ['tile_id', 'epoch'], unique=False)
+    op.create_index('ix_enemies_user_active', 'enemies', ['user_id', 'expires_at'], unique=False,
+                    postgresql_where=sa.text('defeated = 0'))
@@ -0,0 +1,48 @@
+"""Precomputed normalized answers and aliases in the riddle bank
+
+Revision ID: 6f773e91ef13
+Revises: c41e7b09a2d5
+Create Date: 2026-10-17 12:20:05.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from enemies.services.answer_matching import normalize_answer, answer_aliases
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f773e91ef13'
+down_revision: Union[str, None] = 'c41e7b09a2d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('riddle_bank', sa.Column('answer_normalized', sa.String(), nullable=True))
+    op.add_column('riddle_bank', sa.Column('answer_aliases', postgresql.ARRAY(sa.String()), nullable=True))
+
+    # Backfill the riddles that are already in the bank
+    conn = op.get_bind()
+    bank = sa.table(
+        'riddle_bank',
+        sa.column('id', sa.Integer),
+        sa.column('answer', sa.String),
+        sa.column('answer_normalized', sa.String),
+        sa.column('answer_aliases', postgresql.ARRAY(sa.String())),
+    )
+    rows = conn.execute(sa.select(bank.c.id, bank.c.answer)).all()
+    for riddle_id, answer in rows:
+        conn.execute(
+            bank.update()
+            .where(bank.c.id == riddle_id)
+            .values(answer_normalized=normalize_answer(answer), answer_aliases=answer_aliases(answer))
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('riddle_bank', 'answer_aliases')
+    op.drop_column('riddle_bank', 'answer_normalized')
@@ -0,0 +1,86 @@
+"""Riddle bank with per-user seen tracking
+
+Revision ID: 8978a466db63
+Revises: 94c2ecc58775
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8978a466db63'
+down_revision: Union[str, None] = '94c2ecc58775'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'riddle_bank',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('riddle', sa.String(), nullable=False),
+        sa.Column('answer', sa.String(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash'),
+    )
+    op.create_index(op.f('ix_riddle_bank_id'), 'riddle_bank', ['id'], unique=False)
+    op.create_index('ix_riddle_bank_category_id', 'riddle_bank', ['category', 'id'], unique=False)
+
+    op.create_table(
+        'user_seen_riddles',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('seen_bitmap', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+    op.add_column('enemies', sa.Column('riddle_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('enemies_riddle_id_fkey', 'enemies', 'riddle_bank', ['riddle_id'], ['id'])
+
+    # Keep the riddles of live enemies: move them into the bank (same hash as riddle_content_hash)
+    op.execute("""
+        INSERT INTO riddle_bank (category, riddle, answer, content_hash)
+        SELECT DISTINCT ON (h) 'legacy', riddle, answer, h
+        FROM (
+            SELECT riddle, answer,
+                   encode(sha256(convert_to(lower(btrim(riddle)) || E'\\n' || lower(btrim(answer)), 'UTF8')), 'hex') AS h
+            FROM enemies
+            WHERE riddle IS NOT NULL AND answer IS NOT NULL
+        ) AS legacy
+        ON CONFLICT (content_hash) DO NOTHING
+    """)
+    op.execute("""
+        UPDATE enemies e
+        SET riddle_id = b.id
+        FROM riddle_bank b
+        WHERE e.riddle IS NOT NULL AND e.answer IS NOT NULL
+          AND b.content_hash = encode(sha256(convert_to(lower(btrim(e.riddle)) || E'\\n' || lower(btrim(e.answer)), 'UTF8')), 'hex')
+    """)
+
+    op.drop_column('enemies', 'riddle')
+    op.drop_column('enemies', 'answer')
+
+
+def downgrade() -> None:
+    op.add_column('enemies', sa.Column('riddle', sa.String(), nullable=True))
+    op.add_column('enemies', sa.Column('answer', sa.String(), nullable=True))
+    op.execute("""
+        UPDATE enemies e
+        SET riddle = b.riddle, answer = b.answer
+        FROM riddle_bank b
+        WHERE b.id = e.riddle_id
+    """)
+    op.drop_constraint('enemies_riddle_id_fkey', 'enemies', type_='foreignkey')
+    op.drop_column('enemies', 'riddle_id')
+
+    op.drop_table('user_seen_riddles')
+    op.drop_index('ix_riddle_bank_category_id', table_name='riddle_bank')
+    op.drop_index(op.f('ix_riddle_bank_id'), table_name='riddle_bank')
+    op.drop_table('riddle_bank')
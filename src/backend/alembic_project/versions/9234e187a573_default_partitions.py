@@ -0,0 +1,81 @@
+"""DEFAULT partitions for enemies and location_history, old daily partitions trimmed
+
+Revision ID: 9234e187a573
+Revises: 1f4313091c2c
+Create Date: 2026-10-17 22:03:41.572804
+
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9234e187a573'
+down_revision: Union[str, None] = '1f4313091c2c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {
+    'enemies': 'spawn_time',
+    'location_history': 'timestamp',
+}
+
+# The purger's default retention (PURGE_RETENTION_HOURS, LOCATION_HISTORY_RETENTION_DAYS)
+RETENTION = {
+    'enemies': timedelta(hours=24),
+    'location_history': timedelta(days=30),
+}
+
+
+def _drop_partitions_before(conn, table: str, cutoff):
+    """Detach and drop the table's daily partitions whose whole day ended before cutoff."""
+    names = conn.execute(sa.text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:table)
+    """), {'table': table}).scalars().all()
+    for name in sorted(names):
+        suffix = name[len(table) + 2:]
+        if not name.startswith(f'{table}_p') or len(suffix) != 8 or not suffix.isdigit():
+            continue
+        day = datetime.strptime(suffix, '%Y%m%d').date()
+        if day + timedelta(days=1) <= cutoff:
+            op.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+            op.execute(f'DROP TABLE {name}')
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+    for table in PARTITIONED_TABLES:
+        # Rows past the last daily partition land here instead of failing the insert;
+        # the app moves them into daily partitions (services/partitions.py)
+        op.execute(f'CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT')
+        # 5c785d9a8c46 made a partition for every day since the oldest row; keep the
+        # retained window only, as the purger would on its first pass
+        _drop_partitions_before(conn, table, today - RETENTION[table])
+
+
+def downgrade() -> None:
+    # Give the rows the default partition caught a daily partition of their own, then drop it
+    conn = op.get_bind()
+    for table, key in PARTITIONED_TABLES.items():
+        op.execute(f'ALTER TABLE {table} DETACH PARTITION {table}_default')
+        oldest, newest = conn.execute(sa.text(f'SELECT min({key}), max({key}) FROM {table}_default')).one()
+        if oldest is not None:
+            day, last = ((t.astimezone(timezone.utc) if t.tzinfo else t).date() for t in (oldest, newest))
+            while day <= last:
+                end = day + timedelta(days=1)
+                op.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table}_p{day:%Y%m%d} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{day:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+                )
+                day = end
+            op.execute(f'INSERT INTO {table} SELECT * FROM {table}_default')
+        op.execute(f'DROP TABLE {table}_default')
@@ -0,0 +1,34 @@
+"""Widen enemy_defeats.enemy_id for procedural enemy ids
+
+Revision ID: 9c2fc5b236e4
+Revises: 3638eee8c43b
+Create Date: 2026-10-17 18:21:47.093815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2fc5b236e4'
+down_revision: Union[str, None] = '3638eee8c43b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Procedural enemy ids use 53 bits (tile | epoch | index)
+    op.alter_column('enemy_defeats', 'enemy_id',
+               existing_type=sa.Integer(),
+               type_=sa.BigInteger(),
+               existing_nullable=False)
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM enemy_defeats WHERE enemy_id > 2147483647')
+    op.alter_column('enemy_defeats', 'enemy_id',
+               existing_type=sa.BigInteger(),
+               type_=sa.Integer(),
+               existing_nullable=False)
@@ -0,0 +1,29 @@
+"""Index enemies.spawn_time for the batched purge
+
+Revision ID: acad841368f5
+Revises: 9c2fc5b236e4
+Create Date: 2026-10-17 19:02:13.662471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'acad841368f5'
+down_revision: Union[str, None] = '9c2fc5b236e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Each purge batch looks up old enemies by spawn_time
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_enemies_spawn_time ON enemies (spawn_time)')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_enemies_spawn_time')
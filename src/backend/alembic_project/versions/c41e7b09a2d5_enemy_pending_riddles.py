@@ -0,0 +1,26 @@
+"""Enemies remember their place type, so riddles can be picked lazily
+
+Revision ID: c41e7b09a2d5
+Revises: 8978a466db63
+Create Date: 2026-10-17 11:02:17.540918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7b09a2d5'
+down_revision: Union[str, None] = '8978a466db63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('enemies', sa.Column('place_type', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('enemies', 'place_type')
@@ -0,0 +1,32 @@
+"""Per-player world version for enemy delta sync
+
+Revision ID: d196d56359c4
+Revises: 5c785d9a8c46
+Create Date: 2026-10-17 20:31:05.418260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd196d56359c4'
+down_revision: Union[str, None] = '5c785d9a8c46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('world_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    # Existing enemies keep a NULL version: clients pick them up with their first (full) sync
+    op.add_column('enemies', sa.Column('version', sa.BigInteger(), nullable=True))
+    # On the partitioned parent, so every daily partition gets it
+    op.create_index('ix_enemies_user_version', 'enemies', ['user_id', 'version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_enemies_user_version', table_name='enemies')
+    op.drop_column('enemies', 'version')
+    op.drop_column('users', 'world_version')
@@ -0,0 +1,52 @@
+"""Store each place's primary type and priority rank
+
+Revision ID: d35fc0a166d6
+Revises: 6f773e91ef13
+Create Date: 2026-10-17 13:05:52.771023
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from enemies.enums.place_registry import best_place_type
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd35fc0a166d6'
+down_revision: Union[str, None] = '6f773e91ef13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('places', sa.Column('primary_type', sa.String(), nullable=True))
+    op.add_column('places', sa.Column('priority_rank', sa.Integer(), nullable=True))
+
+    # Backfill with the same ranking the app uses on insert
+    conn = op.get_bind()
+    places = sa.table(
+        'places',
+        sa.column('place_id', sa.Integer),
+        sa.column('place_types', postgresql.ARRAY(sa.String())),
+        sa.column('primary_type', sa.String),
+        sa.column('priority_rank', sa.Integer),
+    )
+    rows = conn.execute(sa.select(places.c.place_id, places.c.place_types)).all()
+    for place_id, place_types in rows:
+        priority_rank, primary_type = best_place_type(place_types)
+        conn.execute(
+            places.update()
+            .where(places.c.place_id == place_id)
+            .values(primary_type=primary_type, priority_rank=priority_rank)
+        )
+
+    op.create_index(op.f('ix_places_priority_rank'), 'places', ['priority_rank'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_places_priority_rank'), table_name='places')
+    op.drop_column('places', 'priority_rank')
+    op.drop_column('places', 'primary_type')
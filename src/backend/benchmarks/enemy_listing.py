@@ -0,0 +1,93 @@
+"""
+CPU spent building the enemy list: the previous path (full Enemy objects, then
+shapely decoding of every location) against the projection rows of
+enemies/services/enemy_rows.py (id, type, ST_X, ST_Y, expires_at, defeated).
+
+Needs the database from .env. Everything runs inside a transaction that is rolled
+back at the end (commits become savepoints), so no data is left behind.
+
+Usage (from src/backend):
+    python -m benchmarks.enemy_listing
+    python -m benchmarks.enemy_listing --sizes 10 100 1000 --repeat 20
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from shapely import wkb
+from sqlalchemy.orm import Session
+
+from db import engine
+from models import Enemy, User
+from schemas.basic_location import PointSchema
+from enemies.enemy_schemas import EnemySchema
+from enemies.router import enemy_row_to_schema
+from enemies.services.enemy_rows import active_enemy_rows
+from enemies.services.spawn_enemies_service import insert_enemies
+from benchmarks.spawn_insert import make_enemies
+
+
+def list_with_orm(db: Session, user_id: int) -> list:
+    """The previous body of list_active_enemies."""
+    active_enemies = db.query(Enemy).filter(Enemy.user_id == user_id).filter(Enemy.expires_at > datetime.utcnow()).all()
+    return_enemies = []
+    for e in active_enemies:
+        e_loc = wkb.loads(bytes(e.location.data))
+        return_enemies.append(EnemySchema(
+            id=e.id,
+            enemy_type=e.enemy_type,
+            location=PointSchema(latitude=e_loc.y, longitude=e_loc.x),
+            expires_at=e.expires_at,
+            defeated=e.defeated,
+        ))
+    return return_enemies
+
+
+def list_with_projection(db: Session, user_id: int) -> list:
+    return [enemy_row_to_schema(row) for row in active_enemy_rows(db, user_id)]
+
+
+def measure(db: Session, listing, user_id: int, repeat: int):
+    cpu, wall = [], []
+    for _ in range(repeat):
+        db.expunge_all()  # no identity map hits between runs
+        start_cpu, start_wall = time.process_time(), time.perf_counter()
+        listing(db, user_id)
+        cpu.append((time.process_time() - start_cpu) * 1000)
+        wall.append((time.perf_counter() - start_wall) * 1000)
+    return statistics.median(cpu), statistics.median(wall)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with engine.connect() as conn:
+        outer = conn.begin()
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            print(f"{'enemies':>8} | {'path':<10} | {'cpu ms':>8} | {'wall ms':>8}")
+            for size in args.sizes:
+                # A fresh player per size, so the listing returns exactly size enemies
+                user = User(username=f"benchmark-{time.time_ns()}", password_hash="-")
+                db.add(user)
+                db.commit()
+                insert_enemies(db, make_enemies(user.user_id, size))
+
+                results = {}
+                for name, listing in (("orm", list_with_orm), ("projection", list_with_projection)):
+                    results[name] = measure(db, listing, user.user_id, args.repeat)
+                    cpu_ms, wall_ms = results[name]
+                    print(f"{size:>8} | {name:<10} | {cpu_ms:>8.2f} | {wall_ms:>8.2f}")
+                saved = 1 - results["projection"][0] / results["orm"][0] if results["orm"][0] else 0
+                print(f"{size:>8} | {'cpu saved':<10} | {saved:>8.0%} |")
+        finally:
+            db.close()
+            outer.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+EXPLAIN ANALYZE the hot spawn queries, to check they run on index scans
+(idx_places_bounding_box, idx_enemies_location, idx_location_history_location,
+ix_enemies_user_active, ix_riddle_bank_category_id, ...).
+
+Needs the database from .env. Nothing is kept: the spawn statement really runs
+under EXPLAIN ANALYZE, but the transaction is rolled back at the end.
+
+Usage (from src/backend):
+    python -m benchmarks.explain_queries --lat 52.5200 --lng 13.4050 --user-id 1
+"""
+import argparse
+from datetime import datetime
+
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func, text
+
+from db import SessionLocal
+from models import Enemy, LocationHistory
+from enemies.router import NEARBY_PLACES_LIMIT, NEARBY_RADIUS_M
+from enemies.services.riddle_bank import PROBE_RIDDLES_SQL
+from enemies.services.spawn_enemies_service import nearby_places_query
+from enemies.services.spawn_enemies_sql import (
+    SPAWN_SQL, CANDIDATES_PER_PLACE, _ENEMY_PLACE_TYPES, _ENEMY_TYPES
+)
+from utils.box_point_utils import meters_to_degrees
+
+
+def explain(db, statement, params=None, analyze=False):
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    if not isinstance(statement, str):
+        statement = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    for (line,) in db.execute(text(prefix + statement), params or {}):
+        print("   ", line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lng", type=float, required=True)
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--radius-m", type=float, default=NEARBY_RADIUS_M)
+    parser.add_argument("--category", default="math", help="riddle bank category to probe")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        print("▶ Nearby places (Python engine)")
+        nearby = nearby_places_query(db, args.lng, args.lat, args.radius_m, NEARBY_PLACES_LIMIT)
+        explain(db, nearby.statement, analyze=True)
+
+        # Same bounding box + geography pattern as riddle_prefetch and the spawn's spacing check
+        point = func.ST_SetSRID(func.ST_MakePoint(args.lng, args.lat), 4326)
+        delta_lng, delta_lat = meters_to_degrees(args.lat, args.radius_m)
+        box = func.ST_Expand(point, delta_lng, delta_lat)
+
+        print("▶ Enemies near the player (idx_enemies_location)")
+        near_enemies = (
+            db.query(Enemy.id)
+            .filter(Enemy.location.op("&&")(box))
+            .filter(func.ST_DWithin(cast(Enemy.location, Geography(srid=4326)), cast(point, Geography(srid=4326)), args.radius_m))
+        )
+        explain(db, near_enemies.statement, analyze=True)
+
+        # location is geography already, so ST_DWithin can use the GiST index on its own
+        print("▶ Location history near the player (idx_location_history_location)")
+        near_history = (
+            db.query(LocationHistory.id)
+            .filter(func.ST_DWithin(LocationHistory.location, cast(point, Geography(srid=4326)), args.radius_m))
+        )
+        explain(db, near_history.statement, analyze=True)
+
+        print("▶ Live enemies of the player")
+        live = (
+            db.query(Enemy.id)
+            .filter(Enemy.user_id == args.user_id)
+            .filter(Enemy.expires_at > datetime.utcnow())
+            .filter(Enemy.defeated == 0)
+        )
+        explain(db, live.statement, analyze=True)
+
+        print("▶ Unseen riddle probe (ix_riddle_bank_category_id)")
+        explain(db, PROBE_RIDDLES_SQL.text, {"category": args.category, "count": 10, "bitmap": b"", "bitmap_bits": 0}, analyze=True)
+
+        print("▶ Single-statement spawn (SQL engine, rolled back)")
+        explain(db, SPAWN_SQL.text, {
+            "user_id": args.user_id,
+            "max_enemies": 10,
+            "place_types": list(_ENEMY_PLACE_TYPES),
+            "enemy_types": list(_ENEMY_TYPES),
+            "longitude": args.lng,
+            "latitude": args.lat,
+            "radius_m": args.radius_m,
+            "delta_lng": delta_lng,
+            "delta_lat": delta_lat,
+            "place_limit": NEARBY_PLACES_LIMIT,
+            "candidates_per_place": CANDIDATES_PER_PLACE,
+            "min_distance_m": 40,
+            "lifespan_hours": 2,
+        }, analyze=True)
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
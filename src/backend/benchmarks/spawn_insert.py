@@ -0,0 +1,111 @@
+"""
+Round trips and latency of persisting a spawn: one INSERT ... RETURNING (insert_enemies)
+against the previous add + flush per enemy, commit, refresh per enemy.
+
+Needs the database from .env. Everything runs inside a transaction that is rolled
+back at the end (commits become savepoints), so no data is left behind.
+
+Usage (from src/backend):
+    python -m benchmarks.spawn_insert
+    python -m benchmarks.spawn_insert --sizes 1 10 50 --repeat 20
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db import engine
+from models import Enemy, User
+from enemies.services.spawn_enemies_service import insert_enemies
+
+
+class RoundTripCounter:
+    """Counts statements sent to the database (one statement = one round trip)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+def make_enemies(user_id: int, count: int) -> list:
+    expires_at = datetime.utcnow() + timedelta(hours=2)
+    return [
+        {
+            "enemy_type": "Troll",
+            "location": from_shape(Point(13.4 + i * 1e-4, 52.5), srid=4326),
+            "place_type": "park",
+            "expires_at": expires_at,
+            "defeated": 0,
+            "user_id": user_id,
+        }
+        for i in range(count)
+    ]
+
+
+def insert_one_by_one(db: Session, new_enemies: list) -> list:
+    """The previous persistence path of spawn_enemies."""
+    spawned = []
+    for values in new_enemies:
+        enemy = Enemy(**values)
+        db.add(enemy)
+        db.flush()  # get ID before refresh
+        spawned.append(enemy)
+    db.commit()
+    for e in spawned:
+        db.refresh(e)
+    return spawned
+
+
+def measure(db: Session, insert, user_id: int, size: int, repeat: int):
+    timings, round_trips = [], []
+    for _ in range(repeat):
+        new_enemies = make_enemies(user_id, size)
+        with RoundTripCounter(engine) as counter:
+            start = time.perf_counter()
+            insert(db, new_enemies)
+            timings.append((time.perf_counter() - start) * 1000)
+        round_trips.append(counter.count)
+    return statistics.median(round_trips), statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with engine.connect() as conn:
+        outer = conn.begin()
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            user = User(username=f"benchmark-{time.time_ns()}", password_hash="-")
+            db.add(user)
+            db.commit()
+
+            print(f"{'enemies':>8} | {'engine':<12} | {'round trips':>11} | {'median ms':>9}")
+            for size in args.sizes:
+                for name, insert in (("one by one", insert_one_by_one), ("bulk", insert_enemies)):
+                    round_trips, ms = measure(db, insert, user.user_id, size, args.repeat)
+                    print(f"{size:>8} | {name:<12} | {round_trips:>11.0f} | {ms:>9.2f}")
+        finally:
+            db.close()
+            outer.rollback()
+
+
+if __name__ == "__main__":
+    main()
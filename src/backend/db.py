@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 from config import get_settings
 from alembic.runtime.migration import MigrationContext
 from alembic.autogenerate.api import AutogenContext, compare_metadata
+from services.partitions import is_partition
 
 settings = get_settings()
 
@@ -40,6 +41,9 @@ def check_schema_sync(engine, metadata):
                 "layer",
             }:
                 return False
+            # Daily partitions are created at runtime, not declared in the models
+            if type_ == "table" and is_partition(name):
+                return False
             return True
 
         # Pass it as an option to MigrationContext
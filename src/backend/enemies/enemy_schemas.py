@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from schemas.basic_location import PointSchema
 
@@ -25,4 +25,17 @@ class EnemyDefeatResponse(BaseModel):
     success: bool
     message: str
     new_score: Optional[int] = None
-    enemy: Optional[EnemySchema] = None
\ No newline at end of file
+    enemy: Optional[EnemySchema] = None
+
+class EnemySyncSchema(BaseModel):
+    version: str  # sync token, pass it as since next time
+    full: bool  # added is the full list: replace, don't merge
+    added: List[EnemySchema]
+    defeated: List[int]
+    expired: List[int]
+
+
+class RiddlePrefetchRequest(BaseModel):
+    enemy_ids: Optional[List[int]] = None  # these enemies, or
+    location: Optional[PointSchema] = None  # the enemies around here
+    radius_m: float = 150
@@ -0,0 +1,71 @@
+"""
+Regenerates type_locations_for_enemies.py from the place type catalog the frontend ships
+(src/frontend/public/assets/place_types_expanded.csv), so the two can't drift.
+
+Usage (from src/backend):
+    python -m enemies.enums.generate_place_types          # rewrite the module
+    python -m enemies.enums.generate_place_types --check  # exit 1 if it is out of date
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.abspath(os.path.join(
+    HERE, "..", "..", "..", "frontend", "public", "assets", "place_types_expanded.csv"
+))
+MODULE_PATH = os.path.join(HERE, "type_locations_for_enemies.py")
+INT_COLUMNS = {"id", "category_id"}
+
+
+def read_catalog(csv_path: str = CSV_PATH) -> list:
+    """Read the CSV into the PLACE_TYPES format (trimmed strings, numeric ids as ints)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    place_types = []
+    for row in rows:
+        entry = {}
+        for key, value in row.items():
+            value = value.strip()
+            if key in INT_COLUMNS and value.isdigit():
+                value = int(value)
+            entry[key] = value
+        place_types.append(entry)
+    return place_types
+
+
+def render_module(place_types: list) -> str:
+    return "PLACE_TYPES = " + json.dumps(place_types, indent=2, ensure_ascii=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only check that the module is up to date")
+    parser.add_argument("--csv", default=CSV_PATH, help="path to place_types_expanded.csv")
+    args = parser.parse_args(argv)
+
+    source = render_module(read_catalog(args.csv))
+    with open(MODULE_PATH, encoding="utf-8") as f:
+        current = f.read()
+
+    if args.check:
+        if current != source:
+            print("❌ type_locations_for_enemies.py is out of date - regenerate it from the CSV")
+            return 1
+        print("✅ type_locations_for_enemies.py matches the CSV")
+        return 0
+
+    if current != source:
+        with open(MODULE_PATH, "w", encoding="utf-8") as f:
+            f.write(source)
+        print(f"✅ Regenerated {MODULE_PATH}")
+    else:
+        print("✅ Already up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
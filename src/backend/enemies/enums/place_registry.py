@@ -0,0 +1,74 @@
+"""
+Frozen, constant-time lookups over the place type catalog.
+
+Built once at import from PLACE_TYPES (generated from the frontend's
+place_types_expanded.csv, see generate_place_types.py) and TYPE_PRIORITY.
+"""
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from enums.type_priority import TYPE_PRIORITY
+from enemies.enums.type_locations_for_enemies import PLACE_TYPES
+
+
+class PlaceTypeInfo(NamedTuple):
+    place_type: str
+    enemy_type: str
+    category_id: object   # int, or "NA" for non-POI types
+    category_name: str
+    riddle_description: str
+    file_name: str
+    priority_rank: int
+
+
+# Rank of places whose types are not in TYPE_PRIORITY (after all ranked ones)
+UNRANKED = len(TYPE_PRIORITY)
+
+# First occurrence wins, same as TYPE_PRIORITY.index()
+PRIORITY_RANK = MappingProxyType({
+    place_type: rank for rank, place_type in reversed(list(enumerate(TYPE_PRIORITY)))
+})
+
+PLACE_REGISTRY = MappingProxyType({
+    item["place_type"]: PlaceTypeInfo(
+        place_type=item["place_type"],
+        enemy_type=item["enemy_type"],
+        category_id=item["category_id"],
+        category_name=item["category_name"],
+        riddle_description=item["riddle_description"],
+        file_name=item["file_name"],
+        priority_rank=PRIORITY_RANK.get(item["place_type"], UNRANKED),
+    )
+    for item in PLACE_TYPES
+})
+
+# Every riddle category in the catalog
+RIDDLE_CATEGORIES = tuple(sorted({info.riddle_description for info in PLACE_REGISTRY.values()}))
+
+
+def place_info(place_type: str) -> Optional[PlaceTypeInfo]:
+    return PLACE_REGISTRY.get(place_type)
+
+
+def enemy_type_for(place_type: str) -> Optional[str]:
+    """The enemy living at this place type, or None if it has no enemy."""
+    info = PLACE_REGISTRY.get(place_type)
+    return info.enemy_type if info and info.enemy_type else None
+
+
+def priority_rank(place_type: str) -> int:
+    """Lower = more specific / more preferred. UNRANKED if unknown."""
+    return PRIORITY_RANK.get(place_type, UNRANKED)
+
+
+def best_place_type(place_types) -> tuple:
+    """
+    The most preferred of a place's types, as (rank, place_type).
+    (UNRANKED, None) if none of them is ranked.
+    """
+    best = (UNRANKED, None)
+    for place_type in place_types or ():
+        rank = PRIORITY_RANK.get(place_type, UNRANKED)
+        if rank < best[0]:
+            best = (rank, place_type)
+    return best
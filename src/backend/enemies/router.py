@@ -1,73 +1,184 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+import os
+import asyncio
+from datetime import datetime, timezone
 from shapely import wkb
 
+from db import SessionLocal
 from dependencies import get_db
-from dependencies import get_current_user
-from models import User, Enemy, Place
-from schemas.basic_location import PointSchema, PlaceSchema
-from enemies.enemy_schemas import EnemySchema, EnemyDetailSchema, EnemyDefeatRequest, EnemyDefeatResponse
-from enemies.services.purge_enemies import purge_old_enemies
-from enemies.services.spawn_enemies_service import spawn_enemies
-from enemies.services.general_riddles import check_answer
+from dependencies import get_current_user, authenticate_token
+from models import User, Enemy, RiddleBank, PlayerSpawnState
+from schemas.basic_location import PointSchema
+from enemies.enemy_schemas import (
+    EnemySchema, EnemyDetailSchema, EnemyDefeatRequest, EnemyDefeatResponse, EnemySyncSchema,
+    RiddlePrefetchRequest,
+)
+from enemies.services.purge_enemies import enemy_purger
+from enemies.services.spawn_enemies_service import spawn_enemies, query_nearby_places
+from enemies.services.spawn_enemies_sql import spawn_enemies_sql
+from enemies.services.defeat_enemy_sql import defeat_own_enemy, defeat_shared_enemy
+from enemies.services.riddle_prefetch import PREFETCH_MAX_ENEMIES, prefetch_riddles
+from enemies.services.answer_matching import check_answer
+from enemies.services.riddle_pool import riddle_pool
+from enemies.services.riddle_provider import riddle_provider
+from enemies.services.riddle_materializer import (
+    PREMATERIALIZE_RIDDLES, materialize_riddles, materialize_riddles_in_background
+)
+from enemies.services.shared_world import (
+    SHARED_WORLD, defeated_by, record_spawn_state, spawn_shared, visible_enemies, visible_to
+)
+from enemies.services import procedural_world
+from enemies.services.procedural_world import PROCEDURAL_WORLD
+from enemies.services.spawn_debounce import spawn_debounce
+from enemies.services.enemy_rows import active_enemy_rows
+from enemies.services import enemy_sync
+from enemies.services.event_bus import EVENTS_ENABLED, event_bus
 
 router = APIRouter(prefix="/api/enemies", tags=["enemies"])
 
+# How many of the best-ranked nearby places a spawn looks at, and how far (meters)
+NEARBY_PLACES_LIMIT = 50
+NEARBY_RADIUS_M = 400
+
+# Live enemies a player can have at once
+MAX_ENEMIES = 10
+
+# "sql": single-statement PostGIS spawn (falls back to Python on errors), "python": Python sampler only
+SPAWN_ENGINE = os.getenv("SPAWN_ENGINE", "sql")
+
+# Push channel: a heartbeat after this many idle seconds keeps proxies from closing the socket
+WS_HEARTBEAT_SECONDS = int(os.getenv("WS_HEARTBEAT_SECONDS", "25"))
+
 @router.post("/spawn", response_model=List[EnemySchema])
 def spawn_for_player(
     player_location: PointSchema,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
     """
-    First, purges old enemies
     Spawns enemies around the current player’s location.
     Returns list of active enemies (without riddle/answer).
+    Riddles are picked after the response is sent, or when the player opens one.
     """
 
-    purge_old_enemies(db)
+    # Procedural world: nothing to spawn, enemies are computed from the tile
+    if PROCEDURAL_WORLD:
+        tile_id = procedural_world.tile_for(player_location.latitude, player_location.longitude)
+        record_spawn_state(db, current_user.user_id, tile_id, player_location.latitude, player_location.longitude)
+        db.commit()
+        rows = procedural_world.visible_enemies(db, current_user.user_id, tile_id)
+        return [enemy_row_to_schema(row) for row in rows]
 
-    # 1️⃣ Query nearby places within 400m radius
-    # Assuming Place has a bounding_box (Polygon)
-    nearby_places = (
-        db.query(Place)
-        .filter(
-            Place.bounding_box.ST_DWithin(
-                f"SRID=4326;POINT({player_location.longitude} {player_location.latitude})",
-                0.004  # ~400m in degrees (rough)
+    # Barely moved since a recent spawn and still has a full set: nothing to add
+    if not SHARED_WORLD:
+        active_rows = spawn_debounce.reuse(
+            db, current_user.user_id, player_location.latitude, player_location.longitude, MAX_ENEMIES
+        )
+        if active_rows is not None:
+            return [enemy_row_to_schema(row) for row in active_rows]
+
+    # Shared world: populate the player's tile (once per epoch) and show what's around
+    if SHARED_WORLD:
+        visible_rows, new_ids = spawn_shared(
+            db, current_user.user_id, player_location.latitude, player_location.longitude
+        )
+        if PREMATERIALIZE_RIDDLES and new_ids:
+            background_tasks.add_task(materialize_riddles_in_background, current_user.user_id, new_ids)
+        return [enemy_row_to_schema(row) for row in visible_rows]
+
+    # 1️⃣ Spawn enemies: everything in one SQL statement, or the Python engine as a fallback
+    return_enemies = None
+    if SPAWN_ENGINE == "sql":
+        try:
+            spawned_rows = spawn_enemies_sql(
+                db=db,
+                player=current_user,
+                longitude=player_location.longitude,
+                latitude=player_location.latitude,
+                radius_m=NEARBY_RADIUS_M,
+                place_limit=NEARBY_PLACES_LIMIT,
+                max_enemies=MAX_ENEMIES,
+                min_distance_m=40,
+                lifespan_hours=2,
             )
+            # Same contract as the Python engine: no places around is a 404, not an empty spawn
+            if spawned_rows is None:
+                raise HTTPException(status_code=404, detail="No nearby places found")
+            return_enemies = [enemy_row_to_schema(row) for row in spawned_rows]
+        except SQLAlchemyError as e:
+            db.rollback()
+            print("⚠️ SQL spawn failed, falling back to the Python engine:", e)
+
+    if return_enemies is None:
+        return_enemies = spawn_with_python_engine(db, current_user, player_location)
+
+    # Remember the spawn, to debounce the next one
+    record_spawn_state(db, current_user.user_id, None, player_location.latitude, player_location.longitude)
+    db.commit()
+    if return_enemies:
+        event_bus.publish(current_user.user_id, {"type": "spawn"})
+
+    # 2️⃣ Pick the riddles in the background, racing ahead of the player
+    if PREMATERIALIZE_RIDDLES and return_enemies:
+        background_tasks.add_task(
+            materialize_riddles_in_background,
+            current_user.user_id,
+            [e.id for e in return_enemies],
         )
-        .all()
+
+    # 3️⃣ Return active enemies (without riddle/answer)
+    return return_enemies
+
+
+def enemy_row_to_schema(row) -> EnemySchema:
+    """
+    Build the response from a plain (id, enemy_type, longitude, latitude, expires_at, defeated) row.
+    """
+    return EnemySchema(
+        id=row.id,
+        enemy_type=row.enemy_type,
+        location=PointSchema(latitude=row.latitude, longitude=row.longitude),
+        expires_at=row.expires_at,
+        defeated=row.defeated,
+    )
+
+
+def spawn_with_python_engine(db: Session, current_user, player_location: PointSchema) -> List[EnemySchema]:
+    """
+    The original spawn: query places, sample points in Python, insert.
+    """
+    # Query nearby places within NEARBY_RADIUS_M, best-ranked first
+    # Assuming Place has a bounding_box (Polygon)
+    nearby_places = query_nearby_places(
+        db,
+        longitude=player_location.longitude,
+        latitude=player_location.latitude,
+        radius_m=NEARBY_RADIUS_M,
+        limit=NEARBY_PLACES_LIMIT,
     )
 
     if not nearby_places:
         raise HTTPException(status_code=404, detail="No nearby places found")
 
-    # 2️⃣ Spawn enemies
-    spawned_enemies = spawn_enemies(
+    spawned_rows = spawn_enemies(
         db=db,
         player=current_user,
         nearby_places=nearby_places,
-        max_enemies=10,
-        radius_m=400,
+        longitude=player_location.longitude,
+        latitude=player_location.latitude,
+        max_enemies=MAX_ENEMIES,
+        radius_m=NEARBY_RADIUS_M,
         min_distance_m=40,
         lifespan_hours=2,
     )
-
-    # 3️⃣ Return active enemies (without riddle/answer)
-    return_enemies = []
-    for e in spawned_enemies:
-        e_loc = wkb.loads(bytes(e.location.data))
-        return_enemies.append(EnemySchema(
-            id=e.id,
-            enemy_type=e.enemy_type,
-            location=PointSchema(latitude=e_loc.y, longitude=e_loc.x),
-            expires_at=e.expires_at,
-            defeated=e.defeated,
-        ))
-    return return_enemies
+    return [enemy_row_to_schema(row) for row in spawned_rows]
 
 
 @router.get("/", response_model=List[EnemySchema])
@@ -78,18 +189,164 @@ def list_active_enemies(
     """
     List all active enemies for current player.
     """
-    active_enemies = db.query(Enemy).filter(Enemy.user_id == current_user.user_id).filter(Enemy.expires_at > datetime.utcnow()).all()
-    return_enemies = []
-    for e in active_enemies:
-        e_loc = wkb.loads(bytes(e.location.data))
-        return_enemies.append(EnemySchema(
-            id=e.id,
-            enemy_type=e.enemy_type,
-            location=PointSchema(latitude=e_loc.y, longitude=e_loc.x),
-            expires_at=e.expires_at,
-            defeated=e.defeated,
-        ))
-    return return_enemies
+    if SHARED_WORLD or PROCEDURAL_WORLD:
+        state = db.get(PlayerSpawnState, current_user.user_id)
+        tile_id = state.tile_id if state else None
+        if PROCEDURAL_WORLD:
+            rows = procedural_world.visible_enemies(db, current_user.user_id, tile_id)
+        else:
+            rows = visible_enemies(db, current_user.user_id, tile_id)
+        return [enemy_row_to_schema(row) for row in rows]
+
+    rows = active_enemy_rows(db, current_user.user_id)
+    return [enemy_row_to_schema(row) for row in rows]
+
+@router.get("/sync", response_model=EnemySyncSchema)
+def sync_enemies(
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    What changed in the player's enemies since an earlier sync (pass its version as since):
+    enemies added, ids defeated and ids expired. Without since, everything.
+    Answers 304 Not Modified while the If-None-Match ETag is still current.
+    """
+    if SHARED_WORLD or PROCEDURAL_WORLD:
+        raise HTTPException(status_code=404, detail="Sync is only available in the player world mode")
+
+    etag = enemy_sync.etag(db, current_user)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    return sync_to_schema(enemy_sync.changes_since(db, current_user, since))
+
+
+def sync_to_schema(changes: dict) -> EnemySyncSchema:
+    return EnemySyncSchema(**{**changes, "added": [enemy_row_to_schema(row) for row in changes["added"]]})
+
+
+def push_sync(user_id: int, since: Optional[str], event_type: str) -> tuple:
+    """
+    A sync delta for the push channel, on its own short session (a WebSocket lives too long
+    to hold one). Returns (message, when the player's next live enemy expires).
+    """
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        message = {"type": event_type, **sync_to_schema(enemy_sync.changes_since(db, user, since)).model_dump(mode="json")}
+        return message, enemy_sync.next_expiry(db, user_id)
+    finally:
+        db.close()
+
+@router.websocket("/ws")
+async def enemy_events(websocket: WebSocket, token: str, since: Optional[str] = None):
+    """
+    Push channel for the player's enemies and XP; polling /sync is the fallback.
+    Connect with ?token=<access token>&since=<version of the last sync> to resume.
+    Sends sync deltas ({"type": "sync" | "spawn" | "defeat" | "expire", "version", "full",
+    "added", "defeated", "expired"}), {"type": "xp", "xp_points"} and {"type": "heartbeat"}.
+    """
+    # Accepted first, so browsers see the close code (1008: don't reconnect, keep polling)
+    await websocket.accept()
+    try:
+        user_id = authenticate_token(token)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    if not EVENTS_ENABLED or SHARED_WORLD or PROCEDURAL_WORLD:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Push is off or not available in this world mode")
+        return
+
+    queue = event_bus.subscribe(user_id)
+    try:
+        # Catch up from the client's version, then one delta per event
+        message, expiry = await run_in_threadpool(push_sync, user_id, since, "sync")
+        await websocket.send_json(message)
+        version = message["version"]
+        while True:
+            timeout = WS_HEARTBEAT_SECONDS
+            if expiry is not None:
+                timeout = min(timeout, max((expiry - datetime.now(timezone.utc)).total_seconds(), 0) + 0.5)
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if expiry is None or expiry > datetime.now(timezone.utc):
+                    await websocket.send_json({"type": "heartbeat"})
+                    continue
+                event = {"type": "expire"}
+
+            if event["type"] == "xp":
+                await websocket.send_json(event)
+                continue
+            if event["type"] == "resync":  # fell behind: send everything
+                version, event = None, {"type": "sync"}
+            message, expiry = await run_in_threadpool(push_sync, user_id, version, event["type"])
+            await websocket.send_json(message)
+            version = message["version"]
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_bus.unsubscribe(user_id, queue)
+
+
+@router.get("/stats")
+def enemy_service_stats(user_id: int = Depends(authenticate_token)):
+    """
+    Operational counters for the enemy services (signed-in players only).
+    """
+    return {
+        "riddle_pool": riddle_pool.stats(),
+        "riddle_provider": riddle_provider.stats(),
+        "procedural_tiles": procedural_world.tile_cache.stats(),
+        "spawn_debounce": spawn_debounce.stats(),
+        "purger": enemy_purger.stats(),
+        "events": event_bus.stats(),
+    }
+
+@router.post("/riddles", response_model=List[EnemyDetailSchema])
+def prefetch_enemy_riddles(
+    req: RiddlePrefetchRequest,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(authenticate_token),
+):
+    """
+    Riddles of several enemies at once, for the client to prefetch: the given
+    enemy_ids, or the enemies within radius_m of location (up to NEARBY_RADIUS_M).
+    Solved and expired enemies are left out. Pending riddles are picked from
+    the bank, never from the LLM, so this stays fast.
+    """
+    if req.enemy_ids is None and req.location is None:
+        raise HTTPException(status_code=400, detail="Pass enemy_ids or location")
+    enemy_ids = req.enemy_ids[:PREFETCH_MAX_ENEMIES] if req.enemy_ids is not None else None
+    radius_m = min(req.radius_m, NEARBY_RADIUS_M)
+
+    if PROCEDURAL_WORLD:
+        if enemy_ids is not None:
+            enemies = procedural_world.find_enemies(db, user_id, enemy_ids)
+        else:
+            enemies = procedural_world.enemies_near(
+                db, user_id, req.location.latitude, req.location.longitude, radius_m
+            )[:PREFETCH_MAX_ENEMIES]
+        riddles = procedural_world.pick_riddles(db, enemies)
+        return [
+            EnemyDetailSchema(**enemy_row_to_schema(e).model_dump(), riddle=riddle.riddle)
+            for e, riddle in zip(enemies, riddles)
+        ]
+
+    rows = prefetch_riddles(
+        db,
+        user_id,
+        enemy_ids=enemy_ids,
+        latitude=req.location.latitude if req.location else None,
+        longitude=req.location.longitude if req.location else None,
+        radius_m=radius_m,
+    )
+    return [EnemyDetailSchema(**enemy_row_to_schema(row).model_dump(), riddle=row.riddle) for row in rows]
 
 @router.get("/{enemy_id}/riddle", response_model=EnemyDetailSchema)
 def get_enemy_riddle(
@@ -97,22 +354,43 @@ def get_enemy_riddle(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    enemy = (
-        db.query(Enemy)
-        .filter(Enemy.id == enemy_id, Enemy.user_id == current_user.user_id)
-        .first()
+    """
+    Returns the enemy's riddle, picking it first if the enemy is still pending.
+    """
+    if PROCEDURAL_WORLD:
+        enemy = procedural_world.find_enemy(db, enemy_id)
+        if not enemy:
+            raise HTTPException(status_code=404, detail="Enemy not found")
+        riddle = procedural_world.pick_riddle(db, enemy)
+        return EnemyDetailSchema(
+            **enemy_row_to_schema(enemy).model_dump(exclude={"defeated"}),
+            defeated=procedural_world.is_defeated(db, current_user.user_id, enemy_id),
+            riddle=riddle.riddle,
+        )
+
+    query = (
+        db.query(Enemy, RiddleBank.riddle, defeated_by(current_user.user_id))
+        .outerjoin(RiddleBank, RiddleBank.id == Enemy.riddle_id)
+        .filter(Enemy.id == enemy_id, visible_to(current_user.user_id))
     )
-    if not enemy:
+    row = query.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Enemy not found")
 
+    if row[0].riddle_id is None:
+        materialize_riddles(db, current_user.user_id, [enemy_id])
+        db.expire_all()
+        row = query.first()
+    enemy, riddle, defeated = row
+
     e_loc = wkb.loads(bytes(enemy.location.data))
     return EnemyDetailSchema(
         id=enemy.id,
         enemy_type=enemy.enemy_type,
         location=PointSchema(latitude=e_loc.y, longitude=e_loc.x),
         expires_at=enemy.expires_at,
-        defeated=enemy.defeated,
-        riddle=enemy.riddle,
+        defeated=defeated,
+        riddle=riddle,
     )
 
 @router.post("/{enemy_id}/defeat", response_model=EnemyDefeatResponse)
@@ -120,39 +398,81 @@ def defeat_enemy(
     enemy_id: int,
     req: EnemyDefeatRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    user_id: int = Depends(authenticate_token),
 ):
     """
     Player attempts to solve an enemy's riddle.
+    One read (enemy, answer, defeated), then the defeat and the XP in one statement.
     """
-    enemy = (
-        db.query(Enemy)
-        .filter(Enemy.id == enemy_id, Enemy.user_id == current_user.user_id)
+    if PROCEDURAL_WORLD:
+        return defeat_procedural_enemy(enemy_id, req, db, user_id)
+
+    row = (
+        db.query(
+            Enemy.enemy_type, Enemy.user_id, RiddleBank.answer, RiddleBank.answer_normalized,
+            RiddleBank.answer_aliases, defeated_by(user_id),
+        )
+        .outerjoin(RiddleBank, RiddleBank.id == Enemy.riddle_id)
+        .filter(Enemy.id == enemy_id, visible_to(user_id))
         .first()
     )
-    if not enemy:
+    if not row:
         raise HTTPException(status_code=404, detail="Enemy not found")
+    enemy_type, owner_id, answer, answer_normalized, answer_aliases, defeated = row
 
-    if enemy.defeated:
+    if defeated:
         raise HTTPException(status_code=400, detail="Enemy already defeated")
 
+    if answer is None:
+        raise HTTPException(status_code=400, detail="Open the enemy's riddle first")
+
     # Check answer
-    if not check_answer(req.answer, enemy.answer):
+    if not check_answer(req.answer, answer, normalized_answer=answer_normalized, aliases=answer_aliases):
         return EnemyDefeatResponse(success=False, message="Wrong answer!")
 
-    # ✅ Defeat enemy
-    enemy.defeated = 1
-    db.add(enemy)
+    # ✅ Defeat enemy and award points (shared enemies stay up for everyone else)
+    if owner_id is None:
+        xp_points = defeat_shared_enemy(db, user_id, enemy_id)
+    else:
+        xp_points = defeat_own_enemy(db, user_id, enemy_id)
+    db.commit()
+    if xp_points is None:  # a concurrent request won
+        raise HTTPException(status_code=400, detail="Enemy already defeated")
+
+    if owner_id is not None:
+        event_bus.publish(user_id, {"type": "defeat"})
+    event_bus.publish(user_id, {"type": "xp", "xp_points": xp_points})
+
+    return EnemyDefeatResponse(
+        success=True,
+        message=f"You defeated the {enemy_type}!",
+        new_score=xp_points,
+    )
+
 
-    # Award points
-    current_user.xp_points += 1
-    db.add(current_user)
+def defeat_procedural_enemy(enemy_id: int, req: EnemyDefeatRequest, db: Session, user_id: int) -> EnemyDefeatResponse:
+    """
+    Procedural world defeat: the enemy and its riddle are recomputed from the id,
+    only the defeat is stored.
+    """
+    enemy = procedural_world.find_enemy(db, enemy_id)
+    if not enemy:
+        raise HTTPException(status_code=404, detail="Enemy not found")
+    if procedural_world.is_defeated(db, user_id, enemy_id):
+        raise HTTPException(status_code=400, detail="Enemy already defeated")
+    riddle = procedural_world.pick_riddle(db, enemy)
+
+    if not check_answer(req.answer, riddle.answer, normalized_answer=riddle.answer_normalized, aliases=riddle.answer_aliases):
+        return EnemyDefeatResponse(success=False, message="Wrong answer!")
+
+    xp_points = defeat_shared_enemy(db, user_id, enemy_id)
     db.commit()
-    db.refresh(enemy)
-    db.refresh(current_user)
+    if xp_points is None:
+        raise HTTPException(status_code=400, detail="Enemy already defeated")
+    event_bus.publish(user_id, {"type": "xp", "xp_points": xp_points})
 
     return EnemyDefeatResponse(
         success=True,
         message=f"You defeated the {enemy.enemy_type}!",
-        new_score=current_user.xp_points,
+        new_score=xp_points,
     )
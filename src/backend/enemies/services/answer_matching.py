@@ -0,0 +1,151 @@
+import re
+
+# Compiled once, not on every guess
+_NON_ALNUM = re.compile(r"[^a-z0-9\s]")
+ARTICLES = frozenset({"a", "an", "the"})
+
+_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+         "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+         "seventeen", "eighteen", "nineteen"]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+
+
+def normalize_answer(text) -> str:
+    """
+    Lowercase, strip punctuation and articles, collapse whitespace.
+    """
+    text = _NON_ALNUM.sub("", str(text).lower().strip())  # remove punctuation
+    return " ".join(w for w in text.split() if w not in ARTICLES)  # remove articles
+
+
+def _number_words(n: int) -> list:
+    """'52' -> ['fifty two', 'fiftytwo'] (the hyphen of 'fifty-two' is stripped by normalization)."""
+    if n < 20:
+        return [_ONES[n]]
+    tens, ones = divmod(n, 10)
+    if ones == 0:
+        return [_TENS[tens]]
+    return [f"{_TENS[tens]} {_ONES[ones]}", f"{_TENS[tens]}{_ONES[ones]}"]
+
+
+def _plural_variants(word: str) -> set:
+    """Singular and plural forms of a word, using the common English suffix rules."""
+    variants = set()
+    if len(word) > 3 and word.endswith("ies"):
+        variants.add(word[:-3] + "y")
+    elif len(word) > 2 and word.endswith("es") and word[:-2].endswith(("s", "x", "z", "ch", "sh")):
+        variants.add(word[:-2])
+    elif len(word) > 1 and word.endswith("s") and not word.endswith("ss"):
+        variants.add(word[:-1])
+    else:
+        if word.endswith("y") and len(word) > 1 and word[-2] not in "aeiou":
+            variants.add(word[:-1] + "ies")
+        elif word.endswith(("s", "x", "z", "ch", "sh")):
+            variants.add(word + "es")
+        else:
+            variants.add(word + "s")
+    return variants
+
+
+def answer_aliases(answer) -> list:
+    """
+    Other accepted spellings of an answer, already normalized:
+    singular/plural of the last word, and number words for numeric answers.
+    Computed once when the riddle is stored, not on every guess.
+    """
+    canonical = normalize_answer(answer)
+    if not canonical:
+        return []
+
+    aliases = set()
+    if canonical.isdigit():
+        if int(canonical) < 100:
+            aliases.update(_number_words(int(canonical)))
+    else:
+        words = canonical.split()
+        for variant in _plural_variants(words[-1]):
+            aliases.add(" ".join(words[:-1] + [variant]))
+    aliases.discard(canonical)
+    return sorted(aliases)
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Edit distance between a and b (Levenshtein, plus swapping two adjacent letters
+    counts as one edit), but gives up as soon as it is known to be above
+    max_distance (then returns max_distance + 1).
+    Only the diagonal band of width 2 * max_distance + 1 is computed.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    too_far = max_distance + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        lo = max(1, i - max_distance)
+        hi = min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        row_min = current[0]
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            value = min(
+                previous[j] + 1,         # deletion
+                current[j - 1] + 1,      # insertion
+                previous[j - 1] + cost,  # substitution
+            )
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)  # transposition
+            current[j] = min(value, too_far)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return too_far  # every path is already too far
+        before_previous, previous = previous, current
+    return min(previous[len(b)], too_far)
+
+
+# Answers shorter than this must match exactly: one edit would turn "ox" into almost anything
+MIN_FUZZY_LENGTH = 3
+
+
+def max_edits(length: int, threshold: float) -> int:
+    """
+    How many edits still count as a match for an answer of this length.
+    (1 - threshold) * length, but at least one typo from MIN_FUZZY_LENGTH on,
+    so "egg" still takes "eg" like the old SequenceMatcher ratio did.
+    """
+    if length < MIN_FUZZY_LENGTH:
+        return 0
+    return max(1, int((1 - threshold) * length + 1e-9))
+
+
+def check_answer(user_input, correct_answer, threshold=0.8, normalized_answer=None, aliases=()):
+    """
+    Compare a guess against the answer and its aliases.
+    Exact matches after normalization always pass; otherwise up to
+    max_edits() typos are forgiven. Numbers must match exactly.
+    Pass normalized_answer/aliases as stored in the riddle bank to skip recomputing them.
+    """
+    guess = normalize_answer(user_input)
+    if normalized_answer is None:
+        normalized_answer = normalize_answer(correct_answer)
+        aliases = answer_aliases(correct_answer)
+
+    targets = [normalized_answer, *(aliases or ())]
+    if guess in targets:
+        return True
+    if normalized_answer.isdigit():
+        return False  # no fuzzy matching of numbers
+
+    for target in targets:
+        if target.isdigit():
+            continue  # numeric aliases stay exact too
+        budget = max_edits(len(target), threshold)
+        if budget and bounded_edit_distance(guess, target, budget) <= budget:
+            return True
+    return False
@@ -0,0 +1,60 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# A player's own enemy: defeat, XP and world version in one statement.
+# - target:  the enemy if it's still undefeated; FOR UPDATE makes a concurrent defeat
+#            of the same enemy wait, re-check defeated = 0 and come back empty
+# - scored:  +1 XP and the next world version, only if there was something to defeat
+# - won:     mark the enemy defeated, stamped with that version (see enemy_sync.py)
+DEFEAT_OWN_SQL = text("""
+WITH target AS (
+    SELECT id, spawn_time
+    FROM enemies
+    WHERE id = :enemy_id AND user_id = :user_id AND defeated = 0
+    FOR UPDATE
+),
+scored AS (
+    UPDATE users
+    SET xp_points = COALESCE(xp_points, 0) + 1, world_version = world_version + 1
+    WHERE user_id = :user_id AND EXISTS (SELECT 1 FROM target)
+    RETURNING xp_points, world_version
+),
+won AS (
+    UPDATE enemies e
+    SET defeated = 1, version = scored.world_version
+    FROM target, scored
+    WHERE e.id = target.id AND e.spawn_time = target.spawn_time
+    RETURNING e.id
+)
+SELECT xp_points FROM scored
+""")
+
+# A shared or procedural enemy: the player's enemy_defeats row and XP in one statement.
+# A concurrent insert of the same row waits on the primary key, then conflicts: no XP.
+DEFEAT_SHARED_SQL = text("""
+WITH won AS (
+    INSERT INTO enemy_defeats (user_id, enemy_id) VALUES (:user_id, :enemy_id)
+    ON CONFLICT DO NOTHING
+    RETURNING enemy_id
+)
+UPDATE users
+SET xp_points = COALESCE(xp_points, 0) + 1
+WHERE user_id = :user_id AND EXISTS (SELECT 1 FROM won)
+RETURNING xp_points
+""")
+
+
+def defeat_own_enemy(db: Session, user_id: int, enemy_id: int) -> int | None:
+    """
+    Defeat one of the player's enemies and award the point.
+    Returns the new XP, or None if the enemy was already defeated. No commit.
+    """
+    return db.execute(DEFEAT_OWN_SQL, {"user_id": user_id, "enemy_id": enemy_id}).scalar()
+
+
+def defeat_shared_enemy(db: Session, user_id: int, enemy_id: int) -> int | None:
+    """
+    Record the player's defeat of a shared (or procedural) enemy and award the point.
+    Returns the new XP, or None if they had already defeated it. No commit.
+    """
+    return db.execute(DEFEAT_SHARED_SQL, {"user_id": user_id, "enemy_id": enemy_id}).scalar()
@@ -0,0 +1,30 @@
+"""
+Enemies as plain (id, enemy_type, longitude, latitude, expires_at, defeated) rows,
+the shape every listing response is built from (see enemy_row_to_schema in router.py).
+PostGIS extracts the coordinates, so no ORM objects are built and no WKB is decoded in Python.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Enemy
+
+ENEMY_ROW_COLUMNS = (
+    Enemy.id,
+    Enemy.enemy_type,
+    func.ST_X(Enemy.location).label("longitude"),
+    func.ST_Y(Enemy.location).label("latitude"),
+    Enemy.expires_at,
+    Enemy.defeated,
+)
+
+
+def active_enemy_rows(db: Session, user_id: int, undefeated_only: bool = False) -> list:
+    """The player's enemies that haven't expired (optionally only the undefeated ones)."""
+    query = (
+        db.query(*ENEMY_ROW_COLUMNS)
+        .filter(Enemy.user_id == user_id)
+        .filter(Enemy.expires_at > func.now())
+    )
+    if undefeated_only:
+        query = query.filter(Enemy.defeated == 0)
+    return query.all()
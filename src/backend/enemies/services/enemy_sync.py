@@ -0,0 +1,115 @@
+"""
+Delta sync of a player's enemies (player world mode).
+
+Every change to a player's enemies (a spawn, a defeat) bumps users.world_version,
+and the enemies it touched get the new version in enemies.version. A client that
+last synced at version V and time T then only needs:
+- added:    live enemies with version > V
+- defeated: ids of enemies defeated with version > V
+- expired:  ids of enemies whose expires_at passed since T, defeated or not
+The sync token handed to clients is "<V>-<T in ms>". The ETag is the world version
+plus the next expiry, the only two things that can change the answer, so an
+unchanged world costs one indexed lookup and a 304.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from models import Enemy, User
+from enemies.services.enemy_rows import ENEMY_ROW_COLUMNS, active_enemy_rows
+
+# Older tokens get a full list: past this, purged enemies could be missing from the delta
+SYNC_MAX_AGE_HOURS = int(os.getenv("SYNC_MAX_AGE_HOURS", "12"))
+
+
+def bump_world_version(db: Session, user_id: int) -> int:
+    """
+    Increment the player's world version and return it. No commit.
+    Locks the user's row until commit, so concurrent changes get distinct versions.
+    """
+    return db.execute(
+        update(User)
+        .where(User.user_id == user_id)
+        .values(world_version=User.world_version + 1)
+        .returning(User.world_version)
+    ).scalar_one()
+
+
+def sync_token(version: int, at: datetime) -> str:
+    return f"{version}-{int(at.timestamp() * 1000)}"
+
+
+def parse_sync_token(token: str | None) -> tuple | None:
+    """(version, time) of a sync token, or None if it's missing or malformed."""
+    try:
+        version, ms = token.split("-")
+        return int(version), datetime.fromtimestamp(int(ms) / 1000, tz=timezone.utc)
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def next_expiry(db: Session, user_id: int) -> datetime | None:
+    """When the player's next live enemy expires (partial index ix_enemies_user_active)."""
+    return (
+        db.query(func.min(Enemy.expires_at))
+        .filter(Enemy.user_id == user_id, Enemy.expires_at > func.now(), Enemy.defeated == 0)
+        .scalar()
+    )
+
+
+def etag(db: Session, user: User) -> str:
+    expiry = next_expiry(db, user.user_id)
+    return f'"{user.world_version}-{int(expiry.timestamp()) if expiry else 0}"'
+
+
+def changes_since(db: Session, user: User, since: str | None) -> dict:
+    """
+    The sync response for a client holding the since token:
+    {"version", "full", "added", "defeated", "expired"}, rows for added and ids otherwise.
+    Without a usable token (missing, from the future, too old) added is the full list.
+    """
+    # The version is read before the enemies (get_current_user loaded it), so a change
+    # committed in between is sent again next time rather than lost
+    version = user.world_version
+    now = datetime.now(timezone.utc)
+    token = sync_token(version, now)
+
+    parsed = parse_sync_token(since)
+    if (
+        parsed is None
+        or parsed[0] > version
+        or parsed[1] > now
+        or parsed[1] < now - timedelta(hours=SYNC_MAX_AGE_HOURS)
+    ):
+        return {
+            "version": token,
+            "full": True,
+            "added": active_enemy_rows(db, user.user_id),
+            "defeated": [],
+            "expired": [],
+        }
+    since_version, since_at = parsed
+
+    changed = (
+        db.query(*ENEMY_ROW_COLUMNS)
+        .filter(Enemy.user_id == user.user_id, Enemy.version > since_version)
+        .all()
+    )
+    expired = (
+        db.query(Enemy.id)
+        .filter(
+            Enemy.user_id == user.user_id,
+            Enemy.expires_at > since_at,
+            Enemy.expires_at <= now,
+        )
+        .all()
+    )
+    return {
+        "version": token,
+        "full": False,
+        "added": [row for row in changed if not row.defeated and row.expires_at > now],
+        "defeated": [row.id for row in changed if row.defeated],
+        "expired": [row.id for row in expired],
+    }
@@ -0,0 +1,159 @@
+"""
+Per-player event bus behind the enemy push channel (/api/enemies/ws in enemies/router.py).
+
+Publishers are the request handlers (worker threads), subscribers are WebSocket
+connections, each reading an asyncio queue on the event loop. Events are small
+dicts: {"type": "spawn"}, {"type": "defeat"}, {"type": "xp", "xp_points": 12}.
+
+EVENT_BUS picks the implementation:
+- "memory" (default): in-process, enough for a single worker
+- "postgres": LISTEN/NOTIFY through the database, so an event published by
+  one worker reaches the WebSockets held by every worker
+- "off": no push channel, clients keep polling
+"""
+import asyncio
+import json
+import os
+import select
+import threading
+
+from sqlalchemy import text
+
+from db import engine
+
+EVENT_BUS = os.getenv("EVENT_BUS", "memory")
+EVENTS_ENABLED = EVENT_BUS != "off"
+
+# Events a connection may fall behind by before it gets a resync instead
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+
+EVENT_CHANNEL = "enemy_events"
+LISTEN_RETRY_SECONDS = 5
+
+
+class MemoryEventBus:
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}  # user_id -> {queue: its event loop}
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0, "resyncs": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """A queue that receives the player's events. Call from the event loop."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[queue] = loop
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id: int, event: dict):
+        """Send an event to every connection of the player. Thread-safe, never blocks."""
+        self._count("published")
+        self._deliver(user_id, event)
+
+    def _deliver(self, user_id: int, event: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                pass  # event loop already closed (shutdown)
+
+    def _offer(self, queue: asyncio.Queue, event: dict):
+        """On the event loop: queue the event. A connection that fell behind gets a resync instead."""
+        try:
+            queue.put_nowait(event)
+            self._count("delivered")
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync"})
+            self._count("resyncs")
+
+    def start(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bus": EVENT_BUS,
+                "players": len(self._subscribers),
+                "connections": sum(len(queues) for queues in self._subscribers.values()),
+                **self._stats,
+            }
+
+
+class PostgresEventBus(MemoryEventBus):
+    """
+    Events go through NOTIFY on EVENT_CHANNEL. A listener thread per worker
+    LISTENs on its own connection and hands them to the local subscribers.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def publish(self, user_id: int, event: dict):
+        self._count("published")
+        payload = json.dumps({"user_id": user_id, "event": event})
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENT_CHANNEL, "payload": payload})
+            conn.commit()
+
+    def _listen_once(self):
+        conn = engine.raw_connection()
+        conn.detach()  # a LISTENing connection must not go back to the pool
+        try:
+            dbapi_conn = conn.dbapi_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {EVENT_CHANNEL}")
+            print("📡 Listening for enemy events")
+            while not self._stop.is_set():
+                if select.select([dbapi_conn], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    message = json.loads(dbapi_conn.notifies.pop(0).payload)
+                    self._deliver(message["user_id"], message["event"])
+        finally:
+            conn.close()
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                self._listen_once()
+            except Exception as e:
+                print("⚠️ Enemy event listener failed, reconnecting:", e)
+                self._stop.wait(LISTEN_RETRY_SECONDS)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name="enemy-event-listener", daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+event_bus = PostgresEventBus() if EVENT_BUS == "postgres" else MemoryEventBus()
@@ -1,13 +1,7 @@
-import random
 import os
-import difflib
-import re
 import json
-import ast
-from datetime import datetime
-from openai import OpenAI
-from enemies.enums.type_locations_for_enemies import PLACE_TYPES
-from enemies.services.math_riddles import generate_math_riddle
+from concurrent.futures import ThreadPoolExecutor
+from enemies.services.riddle_provider import riddle_provider
 
 # --------------------
 # Offline fallback riddles
@@ -39,71 +33,107 @@ HF_API_URL = os.getenv("HF_API_URL")
 
 HEADERS = {"Authorization": f"Bearer {HF_API_TOKEN}"}
 
-def get_riddle(location_type):
+# Upper bound on riddles requested in a single batch completion
+RIDDLE_BATCH_MAX = int(os.getenv("RIDDLE_BATCH_MAX", "20"))
+# How many completions may be in flight at once when fetching for a whole spawn
+RIDDLE_FETCH_CONCURRENCY = int(os.getenv("RIDDLE_FETCH_CONCURRENCY", "4"))
+
+def _complete(prompt, temperature=0.8):
     """
-    Try to fetch a riddle + answer from Hugging Face Inference API.
-    We instruct the AI to return JSON so we can parse it easily.
-    Falls back to offline riddles if request fails.
-    Generates a math riddle offline for the specific place types
+    Send a single chat completion through the shared riddle provider.
+    Raises CircuitOpenError right away while the upstream is known to be failing.
     """
-    # The AI isn't working! It's caching the answer!!!
+    return riddle_provider.complete(prompt, temperature=temperature)
 
-    location_info = {}
-    # Find location type information
-    for item in PLACE_TYPES:
-        if item["place_type"]==location_type:
-            location_info = item
-            break
+def _valid_riddle_item(item):
+    if not isinstance(item, dict):
+        return False
+    riddle = item.get("riddle")
+    answer = item.get("answer")
+    if not isinstance(riddle, str) or not riddle.strip():
+        return False
+    if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+        return True
+    return isinstance(answer, str) and 0 < len(answer.split()) <= 3
 
-    if location_info == {}:
-        return random.choice(FALLBACK_RIDDLES)
+def parse_riddle_list_json(content):
+    """
+    Parse the model's reply into a list of {"riddle", "answer"} dicts.
+    Every item is validated on its own, so one broken item only drops itself.
+    Accepts a bare array, an object holding the array under "riddles",
+    and arrays surrounded by extra text.
+    """
+    data = None
+    try:
+        data = json.loads(content)
+        if isinstance(data, str):
+            data = json.loads(data)
+    except Exception:
+        # Models like to add text around the JSON - cut out the array
+        start, end = content.find("["), content.rfind("]")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(content[start:end + 1])
+            except Exception:
+                data = None
 
-    # For math riddles, generate without API
-    if location_info["riddle_description"]=="math":
-        return generate_math_riddle()
+    if isinstance(data, dict):
+        data = data.get("riddles", [data])
+    if not isinstance(data, list):
+        return []
 
-    prompt = f"""Generate a JSON object with keys "riddle" and "answer".
-        {location_info["riddle_description"]}
-        The answer must be one or two words.
-        Format strictly as a valid JSON: {{\"riddle\": \"...\", \"answer\": \"...\"}}."""
-    try:
-        print("------> Debug: Trying to create a client")
-        client = OpenAI(
-            base_url="https://router.huggingface.co/v1",
-            api_key=HF_API_TOKEN,
-        )
-        print("------> Debug: Client created. Sending a request")
-        completion = client.chat.completions.create(
-            model="openai/gpt-oss-120b:fireworks-ai",
-            temperature=0.8,
-            top_p=0.9,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-        )
+    riddles = []
+    seen = set()
+    for item in data:
+        if not _valid_riddle_item(item):
+            continue
+        riddle = item["riddle"].strip()
+        if riddle.lower() in seen:
+            continue
+        seen.add(riddle.lower())
+        riddles.append({"riddle": riddle, "answer": str(item["answer"]).strip()})
+    return riddles
 
-        answer = json.loads(completion.choices[0].message.content)
-        try:
-            data = json.loads(answer)
-        except:
-            data = ast.literal_eval(answer)
-        if "riddle" in data and "answer" in data:
-            return data
+def generate_riddles(riddle_description, count):
+    """
+    Ask the LLM for `count` riddles about the same category in one completion.
+    Returns the valid riddles (possibly fewer than asked for, or none on failure).
+    """
+    count = max(1, min(count, RIDDLE_BATCH_MAX))
+    prompt = f"""Generate a JSON array of {count} different riddles.
+        {riddle_description}
+        Each item is an object with keys "riddle" and "answer".
+        Each answer must be one or two words.
+        Format strictly as a valid JSON array: [{{\"riddle\": \"...\", \"answer\": \"...\"}}, ...]."""
+    try:
+        return parse_riddle_list_json(_complete(prompt, temperature=0.9))[:count]
     except Exception:
-        return random.choice(FALLBACK_RIDDLES)
+        return []
+
+def generate_riddles_concurrently(counts, max_workers=RIDDLE_FETCH_CONCURRENCY):
+    """
+    Fetch riddles for several categories at once, e.g. {category: how_many}.
+    Each category is split into batches of at most RIDDLE_BATCH_MAX, and the batches
+    run in parallel (bounded by max_workers), so the wall-clock time is about
+    the slowest single completion instead of the sum of all of them.
+    Returns {category: [riddles]}. A failed batch just contributes nothing,
+    the caller decides how to fall back for the missing ones.
+    """
+    jobs = []
+    for category, count in counts.items():
+        while count > 0:
+            jobs.append((category, min(count, RIDDLE_BATCH_MAX)))
+            count -= RIDDLE_BATCH_MAX
 
-def normalize_answer(text: str) -> str:
-    text = text.lower().strip()
-    text = re.sub(r'[^a-z0-9\s]', '', text)  # remove punctuation
-    words = text.split()
-    words = [w for w in words if w not in {"a", "an", "the"}]  # remove articles
-    return " ".join(words)
+    results = {category: [] for category in counts}
+    if not jobs:
+        return results
 
-def check_answer(user_input, correct_answer, threshold=0.8):
-    norm_user = normalize_answer(user_input)
-    norm_correct = normalize_answer(correct_answer)
-    ratio = difflib.SequenceMatcher(None, norm_user, norm_correct).ratio()
-    return ratio >= threshold
\ No newline at end of file
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+        futures = [
+            (category, executor.submit(generate_riddles, category, count))
+            for category, count in jobs
+        ]
+        for category, future in futures:
+            results[category].extend(future.result())
+    return results
@@ -1,4 +1,74 @@
-import random
+import numpy as np
+
+OPERATIONS = np.array(["+", "-", "*", "/"])
+
+# For every operation, the valid first operands and how many second operands fit each of them.
+# Sampling the first operand with these weights (and then the second one uniformly)
+# is uniform over all valid pairs - the same distribution the old rejection loop had,
+# without the loop.
+_ADD_A = np.arange(1, 99)            # a + b < 100  ->  b in 1..99-a
+_ADD_WEIGHTS = (99 - _ADD_A) / (99 - _ADD_A).sum()
+_SUB_B = np.arange(1, 100)           # 0 < a - b, a <= 100  ->  a in b+1..100
+_SUB_WEIGHTS = (100 - _SUB_B) / (100 - _SUB_B).sum()
+_MUL_A = np.arange(1, 100)           # a * b < 100  ->  b in 1..99//a
+_MUL_WEIGHTS = (99 // _MUL_A) / (99 // _MUL_A).sum()
+
+
+def generate_math_riddles(count: int, rng: np.random.Generator | None = None) -> list:
+    """
+    Generate `count` random simple math riddles in one vectorized pass.
+
+    Same riddles as generate_math_riddle(): one of + - * /, operands up to 100,
+    the answer is an integer with 0 < answer < 100, and divisions are always exact.
+    The operands are sampled directly from the valid ranges, so there is no
+    rejection loop and no eval().
+
+    Args:
+        count: how many riddles to generate
+        rng: optional numpy Generator (pass a seeded one for reproducible riddles)
+
+    Returns:
+        list[dict]: [{"riddle": "What is 42 / 6?", "answer": 7}, ...]
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    ops = rng.integers(0, len(OPERATIONS), size=count)
+    a = np.empty(count, dtype=np.int64)
+    b = np.empty(count, dtype=np.int64)
+    answers = np.empty(count, dtype=np.int64)
+
+    # Addition
+    mask = ops == 0
+    n = int(mask.sum())
+    a[mask] = rng.choice(_ADD_A, size=n, p=_ADD_WEIGHTS)
+    b[mask] = rng.integers(1, 100 - a[mask])
+    answers[mask] = a[mask] + b[mask]
+
+    # Subtraction
+    mask = ops == 1
+    n = int(mask.sum())
+    b[mask] = rng.choice(_SUB_B, size=n, p=_SUB_WEIGHTS)
+    a[mask] = b[mask] + rng.integers(1, 101 - b[mask])
+    answers[mask] = a[mask] - b[mask]
+
+    # Multiplication
+    mask = ops == 2
+    n = int(mask.sum())
+    a[mask] = rng.choice(_MUL_A, size=n, p=_MUL_WEIGHTS)
+    b[mask] = rng.integers(1, 99 // a[mask] + 1)
+    answers[mask] = a[mask] * b[mask]
+
+    # Division: build a divisible pair from the divisor and the answer
+    mask = ops == 3
+    n = int(mask.sum())
+    b[mask] = rng.integers(1, 11, size=n)
+    answers[mask] = rng.integers(1, 11, size=n)
+    a[mask] = b[mask] * answers[mask]
+
+    return [
+        {"riddle": f"What is {x} {op} {y}?", "answer": int(answer)}
+        for x, op, y, answer in zip(a.tolist(), OPERATIONS[ops].tolist(), b.tolist(), answers.tolist())
+    ]
+
 
 def generate_math_riddle():
     """
@@ -11,31 +81,15 @@ def generate_math_riddle():
     - Division (/), restricted so that the result is always an integer.
 
     Returns:
-        tuple[str, int]: A tuple containing:
-            - question (str): The math riddle in plain English
+        dict: A dict containing:
+            - riddle (str): The math riddle in plain English
             - answer (int): The correct integer answer to the riddle
 
     Example:
-        q, a = generate_math_riddle()
-        print(q)
+        r = generate_math_riddle()
+        print(r["riddle"])
         "What is 42 / 6?"
-        print(a)
+        print(r["answer"])
         7
     """
-    answer = -1
-    while not 0 < answer < 100:
-        operations = ["+", "-", "*", "/"]
-        op = random.choice(operations)
-
-        a = random.randint(1, 100)
-        b = random.randint(1, 100)
-
-        if op == "/":
-            # ensure integer division by constructing a divisible pair
-            b = random.randint(1, 10)
-            a = b * random.randint(1, 10)
-
-        question = f"What is {a} {op} {b}?"
-        answer = eval(f"{a}{op}{b}")
-        answer = int(answer)
-    return {"riddle": question, "answer": answer}
\ No newline at end of file
+    return generate_math_riddles(1)[0]
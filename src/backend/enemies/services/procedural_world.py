@@ -0,0 +1,341 @@
+"""
+Procedural world mode: enemies are never stored.
+
+Every place has one home tile (the geohash of a point on its surface) and at most
+one enemy per epoch, placed by an RNG seeded with (place_id, epoch), so every
+process computes the same enemies, positions and riddle picks. Ids encode the
+place and the epoch: an id always stands for the same place's enemy, whatever
+places were added since, and any enemy can be recomputed from its id alone.
+Only defeats are written (enemy_defeats).
+"""
+import os
+import random
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+from geoalchemy2.shape import to_shape
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import EnemyDefeat, Place, RiddleBank
+from enemies.enums.place_registry import best_place_type, enemy_type_for
+from enemies.services.general_riddles import FALLBACK_RIDDLES
+from enemies.services.riddle_bank import FALLBACK_CATEGORY, bank_fresh_riddles, bank_riddles, riddle_category
+from enemies.services.shared_world import WORLD_MODE, current_epoch, epoch_end
+from enemies.services.spawn_enemies_service import local_projection
+from utils import geohash
+from utils.polygon_sampler import TriangleSampler, sampler_for, triangulate
+
+PROCEDURAL_WORLD = WORLD_MODE == "procedural"
+
+# Enemy ids fit in 53 bits (a JavaScript-safe integer):
+#   36 bits place_id | 17 bits epoch
+TILE_PRECISION = 6
+EPOCH_BITS = 17
+
+PROCEDURAL_TILE_MAX_ENEMIES = int(os.getenv("PROCEDURAL_TILE_MAX_ENEMIES", "40"))
+PROCEDURAL_CACHE_TILES = int(os.getenv("PROCEDURAL_CACHE_TILES", "1024"))
+PROCEDURAL_TILE_PLACE_LIMIT = 200
+PROCEDURAL_MIN_DISTANCE_M = 40
+PROCEDURAL_SEED_ATTEMPTS = 30  # points a place tries before it gives up its enemy
+
+# Below this many riddles in a category, fresh ones (pool, math) are banked for the next epochs
+PROCEDURAL_BANK_TARGET = int(os.getenv("PROCEDURAL_BANK_TARGET", "50"))
+# Riddles banked this long before an epoch began are the ones it picks from; the margin
+# covers transactions still open at the boundary, so every process sees the same set
+RIDDLE_SNAPSHOT_MARGIN = timedelta(minutes=5)
+
+# A place's home tile: computed by PostGIS both when a tile is generated and when an id is looked up
+PLACE_TILE = func.ST_GeoHash(func.ST_PointOnSurface(Place.bounding_box), TILE_PRECISION)
+
+
+class ProceduralEnemy(NamedTuple):
+    id: int
+    enemy_type: str
+    place_type: str
+    longitude: float
+    latitude: float
+    expires_at: object
+    defeated: bool = False
+
+
+def enemy_id(place_id: int, epoch: int) -> int:
+    return (place_id << EPOCH_BITS) | (epoch & ((1 << EPOCH_BITS) - 1))
+
+
+def decode_enemy_id(value: int):
+    """(place_id, epoch) of a live enemy id, or None if it isn't from the current epoch."""
+    epoch = current_epoch()
+    if value < 0 or value & ((1 << EPOCH_BITS) - 1) != epoch & ((1 << EPOCH_BITS) - 1):
+        return None
+    return value >> EPOCH_BITS, epoch
+
+
+def tile_for(latitude: float, longitude: float) -> str:
+    return geohash.encode(latitude, longitude, TILE_PRECISION)
+
+
+def _tile_places(db: Session, tile_id: str):
+    """
+    The enemy-hosting places whose home is the tile, best first:
+    [(place_id, place_type, enemy_type, polygon clipped to the tile, whether it was clipped)].
+    """
+    west, south, east, north = geohash.bounds(tile_id)
+    envelope = shapely.box(west, south, east, north)
+    places = (
+        db.query(Place)
+        .filter(Place.bounding_box.op("&&")(func.ST_MakeEnvelope(west, south, east, north, 4326)))
+        .filter(PLACE_TILE == tile_id)
+        .order_by(Place.priority_rank, Place.place_id)
+        .limit(PROCEDURAL_TILE_PLACE_LIMIT)
+        .all()
+    )
+
+    tile_places = []
+    for place in places:
+        if place.priority_rank is None:
+            rank, place_type = best_place_type(place.place_types)
+        else:
+            rank, place_type = place.priority_rank, place.primary_type
+        enemy_type = enemy_type_for(place_type)
+        if not enemy_type:
+            continue
+        geom = to_shape(place.bounding_box)
+        if not geom.is_valid or geom.is_empty:
+            continue
+        # Enemies stay in their home tile, where players nearby look for them
+        clipped = not envelope.contains(geom)
+        area = geom.intersection(envelope) if clipped else geom
+        if area.is_empty or area.area == 0:
+            continue
+        tile_places.append((rank, place.place_id, place_type, enemy_type, area, clipped))
+    tile_places.sort(key=lambda p: p[:2])
+    return [p[1:] for p in tile_places]
+
+
+def generate_tile(db: Session, tile_id: str, epoch: int) -> list:
+    """
+    The enemies of a tile for an epoch, as ProceduralEnemy, best places first.
+    Each place draws candidate points from an RNG seeded with (place_id, epoch) and
+    keeps the first one at least PROCEDURAL_MIN_DISTANCE_M from the enemies of
+    better places. Same places + same epoch = same enemies, in any process.
+    """
+    tile_places = _tile_places(db, tile_id)
+    if not tile_places:
+        return []
+
+    west, south, east, north = geohash.bounds(tile_id)
+    to_meters, to_degrees = local_projection((south + north) / 2, (west + east) / 2)
+    min_distance_sq = PROCEDURAL_MIN_DISTANCE_M ** 2
+    expires_at = epoch_end(epoch)
+    taken = np.empty((0, 2))
+    enemies = []
+    for place_id, place_type, enemy_type, area, clipped in tile_places:
+        if len(enemies) >= PROCEDURAL_TILE_MAX_ENEMIES:
+            break
+        if clipped:
+            sampler = TriangleSampler(triangulate(shapely.transform(area, to_meters)))
+        else:
+            # Triangulated once (cached by geometry), the projection is affine so draws stay uniform
+            sampler = sampler_for(area).transform(to_meters)
+        candidates = sampler.sample(PROCEDURAL_SEED_ATTEMPTS, np.random.default_rng([place_id, epoch]))
+        if len(taken):
+            distances_sq = ((candidates[:, None, :] - taken[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+            candidates = candidates[distances_sq >= min_distance_sq]
+        if not len(candidates):
+            continue  # crowded out by better places this epoch
+        taken = np.vstack((taken, candidates[:1]))
+        lng, lat = to_degrees(candidates[:1])[0]
+        enemies.append(ProceduralEnemy(
+            id=enemy_id(place_id, epoch),
+            enemy_type=enemy_type,
+            place_type=place_type,
+            longitude=float(lng),
+            latitude=float(lat),
+            expires_at=expires_at,
+        ))
+    return enemies
+
+
+class TileCache:
+    """In-process LRU of generated tiles, keyed by (tile_id, epoch)."""
+
+    def __init__(self, max_tiles: int):
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, tile_id: str, epoch: int) -> list:
+        key = (tile_id, epoch)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return self._tiles[key]
+            self.misses += 1
+
+        enemies = generate_tile(db, tile_id, epoch)  # deterministic: racing generations agree
+
+        with self._lock:
+            self._tiles[key] = enemies
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return enemies
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tiles": len(self._tiles), "hits": self.hits, "misses": self.misses}
+
+
+tile_cache = TileCache(PROCEDURAL_CACHE_TILES)
+
+
+def _defeated_ids(db: Session, user_id: int, enemy_ids: list) -> set:
+    if not enemy_ids:
+        return set()
+    rows = (
+        db.query(EnemyDefeat.enemy_id)
+        .filter(EnemyDefeat.user_id == user_id, EnemyDefeat.enemy_id.in_(enemy_ids))
+        .all()
+    )
+    return {enemy_id for (enemy_id,) in rows}
+
+
+def visible_enemies(db: Session, user_id: int, tile_id: str | None) -> list:
+    """The enemies of the tile and its neighbours that the player hasn't solved."""
+    if tile_id is None:
+        return []
+    epoch = current_epoch()
+    enemies = [e for tile in geohash.neighbors(tile_id) for e in tile_cache.get(db, tile, epoch)]
+    defeated = _defeated_ids(db, user_id, [e.id for e in enemies])
+    return [e for e in enemies if e.id not in defeated]
+
+
+def enemies_near(db: Session, user_id: int, latitude: float, longitude: float, radius_m: float) -> list:
+    """The visible enemies within radius_m of a point, nearest first."""
+    enemies = visible_enemies(db, user_id, tile_for(latitude, longitude))
+    if not enemies:
+        return []
+    to_meters, _ = local_projection(latitude, longitude)
+    distances = np.hypot(*to_meters(np.array([(e.longitude, e.latitude) for e in enemies])).T)
+    return [enemies[i] for i in np.argsort(distances) if distances[i] <= radius_m]
+
+
+def find_enemies(db: Session, user_id: int, enemy_ids: list) -> list:
+    """The enemies among enemy_ids that are live and the player hasn't solved."""
+    enemies = _live_enemies(db, enemy_ids)
+    defeated = _defeated_ids(db, user_id, [e.id for e in enemies])
+    return [e for e in enemies if e.id not in defeated]
+
+
+def _live_enemies(db: Session, enemy_ids: list) -> list:
+    """Recompute the live enemies among enemy_ids: their places' home tiles, from the tile cache."""
+    decoded = [(value, decode_enemy_id(value)) for value in enemy_ids]
+    place_ids = {d[0] for _, d in decoded if d is not None}
+    if not place_ids:
+        return []
+    tiles = dict(db.query(Place.place_id, PLACE_TILE).filter(Place.place_id.in_(place_ids)).all())
+
+    enemies = []
+    for value, d in decoded:
+        if d is None or d[0] not in tiles:
+            continue
+        place_id, epoch = d
+        # A place crowded out this epoch has no enemy in its tile
+        enemy = next((e for e in tile_cache.get(db, tiles[place_id], epoch) if e.id == value), None)
+        if enemy is not None:
+            enemies.append(enemy)
+    return enemies
+
+
+def find_enemy(db: Session, enemy_id: int):
+    """Recompute a live enemy from its id, or None."""
+    enemies = _live_enemies(db, [enemy_id])
+    return enemies[0] if enemies else None
+
+
+def is_defeated(db: Session, user_id: int, enemy_id: int) -> bool:
+    return bool(_defeated_ids(db, user_id, [enemy_id]))
+
+
+_riddle_snapshots = {}  # (category, epoch) -> riddle ids, see riddle_snapshot()
+_riddle_snapshots_lock = threading.Lock()
+
+
+def riddle_snapshot(db: Session, category: str, epoch: int) -> list:
+    """
+    The ids of the category's riddles an epoch picks from: those banked before it
+    began, so riddles banked since can't change a pick. Cached per process for the epoch.
+    A category short of PROCEDURAL_BANK_TARGET gets fresh riddles banked for the next epochs (commits).
+    """
+    key = (category, epoch)
+    with _riddle_snapshots_lock:
+        if key in _riddle_snapshots:
+            return _riddle_snapshots[key]
+
+    started = epoch_end(epoch - 1) - RIDDLE_SNAPSHOT_MARGIN
+    ids = [
+        i for (i,) in
+        db.query(RiddleBank.id)
+        .filter(RiddleBank.category == category, RiddleBank.created_at < started)
+        .order_by(RiddleBank.id)
+    ]
+    if len(ids) < PROCEDURAL_BANK_TARGET and category != FALLBACK_CATEGORY:
+        if bank_fresh_riddles(db, category, PROCEDURAL_BANK_TARGET - len(ids)):
+            db.commit()
+
+    with _riddle_snapshots_lock:
+        for stale in [k for k in _riddle_snapshots if k[1] < epoch]:
+            del _riddle_snapshots[stale]
+        _riddle_snapshots[key] = ids
+    return ids
+
+
+def pick_riddle(db: Session, enemy: ProceduralEnemy):
+    """
+    The enemy's riddle: a pick from its category's riddle_snapshot, seeded by the
+    enemy id, so it stays the same all epoch (an offline riddle if the bank had none).
+    Returns a RiddleBank row.
+    """
+    return pick_riddles(db, [enemy])[0]
+
+
+def pick_riddles(db: Session, enemies: list) -> list:
+    """
+    Batch version of pick_riddle(): one snapshot per category, one query for the rows.
+    Returns RiddleBank rows in the same order as enemies.
+    """
+    if not enemies:
+        return []
+    epoch = current_epoch()
+    snapshots = {}
+
+    def snapshot(category):
+        if category not in snapshots:
+            snapshots[category] = riddle_snapshot(db, category, epoch)
+        return snapshots[category]
+
+    riddle_ids = []
+    offline = []
+    for enemy in enemies:
+        ids = snapshot(riddle_category(enemy.place_type)) or snapshot(FALLBACK_CATEGORY)
+        rng = random.Random(enemy.id)
+        if ids:
+            riddle_ids.append(ids[rng.randrange(len(ids))])
+        else:
+            riddle_ids.append(None)
+            offline.append((len(riddle_ids) - 1, rng.choice(FALLBACK_RIDDLES)))
+    if offline:
+        banked = bank_riddles(db, FALLBACK_CATEGORY, [riddle for _, riddle in offline])
+        db.commit()
+        for (i, _), riddle_id in zip(offline, banked):
+            riddle_ids[i] = riddle_id
+
+    rows = {row.id: row for row in db.query(RiddleBank).filter(RiddleBank.id.in_(set(riddle_ids)))}
+    return [rows[riddle_id] for riddle_id in riddle_ids]
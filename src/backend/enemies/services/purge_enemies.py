@@ -1,18 +1,184 @@
+"""
+Deletes old enemies (and shared world bookkeeping) off the request path.
+
+The purger runs in a background thread started by the app lifespan
+(ENEMY_PURGER=1, the default), or as its own worker process:
+
+    python -m enemies.services.purge_enemies          # loop forever
+    python -m enemies.services.purge_enemies --once   # one pass, e.g. from cron
+
+Partitioned tables (see services/partitions.py) are purged by dropping whole
+daily partitions, and get their upcoming partitions created on every pass.
+Other rows are deleted in batches of PURGE_BATCH_SIZE, each in its own short
+transaction, so a large backlog never locks many rows at once. A PostgreSQL
+advisory lock makes sure only one purger (app process or worker) works at a time.
+"""
+import argparse
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from models import Enemy
-
-def purge_old_enemies(db: Session):
-    """
-    Delete all enemies whose spawn_time is older than 24 hours.
-    """
-    cutoff = datetime.utcnow() - timedelta(hours=24)
-
-    deleted_count = (
-        db.query(Enemy)
-        .filter(Enemy.spawn_time < cutoff)
-        .delete(synchronize_session=False)
-    )
-
-    db.commit()
-    return deleted_count
\ No newline at end of file
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from db import engine
+from services.partitions import drop_partitions_before, ensure_partitions
+
+ENEMY_PURGER = os.getenv("ENEMY_PURGER", "1") == "1"
+PURGE_INTERVAL_SECONDS = int(os.getenv("PURGE_INTERVAL_SECONDS", "300"))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+PURGE_RETENTION_HOURS = int(os.getenv("PURGE_RETENTION_HOURS", "24"))
+LOCATION_HISTORY_RETENTION_DAYS = int(os.getenv("LOCATION_HISTORY_RETENTION_DAYS", "30"))
+
+# Arbitrary, app-wide key for pg_try_advisory_lock
+PURGE_LOCK_KEY = 7_291_301
+
+# One batch: pick up to :batch old rows (skipping rows other transactions hold), delete them.
+# Tables without a single-column key are addressed by ctid.
+PURGE_BATCHES = {
+    "enemies": text("""
+        DELETE FROM enemies WHERE id IN (
+            SELECT id FROM enemies WHERE spawn_time < :cutoff
+            LIMIT :batch FOR UPDATE SKIP LOCKED
+        )
+    """),
+    "enemy_defeats": text("""
+        DELETE FROM enemy_defeats WHERE ctid IN (
+            SELECT ctid FROM enemy_defeats WHERE defeated_at < :cutoff
+            LIMIT :batch FOR UPDATE SKIP LOCKED
+        )
+    """),
+    "world_tiles": text("""
+        DELETE FROM world_tiles WHERE ctid IN (
+            SELECT ctid FROM world_tiles WHERE spawned_at < :cutoff
+            LIMIT :batch FOR UPDATE SKIP LOCKED
+        )
+    """),
+}
+
+
+def purge_table(conn: Connection, table: str, cutoff: datetime, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete the table's rows older than cutoff, one committed batch at a time. Returns the count."""
+    deleted = 0
+    while True:
+        result = conn.execute(PURGE_BATCHES[table], {"cutoff": cutoff, "batch": batch_size})
+        conn.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+class EnemyPurger:
+    def __init__(self, interval_seconds: int = PURGE_INTERVAL_SECONDS, batch_size: int = PURGE_BATCH_SIZE):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "skipped": 0,  # another purger held the lock
+            "errors": 0,
+            "deleted_total": 0,
+            "last_run_at": None,
+            "last_duration_ms": None,
+            "last_deleted": {},  # table -> rows deleted
+            "last_dropped_partitions": [],
+        }
+
+    def run_once(self) -> dict | None:
+        """
+        One purge pass over every table. Returns the deleted counts,
+        or None if another purger is already running.
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=PURGE_RETENTION_HOURS)
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            # Session-level lock: held across the batch commits, on this connection only
+            locked = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": PURGE_LOCK_KEY}).scalar()
+            conn.commit()
+            if not locked:
+                with self._lock:
+                    self._stats["skipped"] += 1
+                return None
+            try:
+                partitioned = ensure_partitions(conn)
+                deleted, dropped = {}, []
+                for table in PURGE_BATCHES:
+                    if table in partitioned:
+                        dropped += drop_partitions_before(conn, table, cutoff)
+                    else:
+                        deleted[table] = purge_table(conn, table, cutoff, self.batch_size)
+                if "location_history" in partitioned:
+                    history_cutoff = datetime.utcnow() - timedelta(days=LOCATION_HISTORY_RETENTION_DAYS)
+                    dropped += drop_partitions_before(conn, "location_history", history_cutoff)
+            finally:
+                conn.rollback()  # in case a batch failed
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PURGE_LOCK_KEY})
+                conn.commit()
+
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["deleted_total"] += sum(deleted.values())
+            self._stats["last_run_at"] = datetime.utcnow().isoformat()
+            self._stats["last_duration_ms"] = duration_ms
+            self._stats["last_deleted"] = deleted
+            self._stats["last_dropped_partitions"] = dropped
+        if any(deleted.values()) or dropped:
+            print(f"🧹 Purged {deleted}, dropped partitions {dropped} in {duration_ms} ms")
+        return deleted
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                with self._lock:
+                    self._stats["errors"] += 1
+                print("⚠️ Enemy purge failed:", e)
+            self._stop.wait(self.interval_seconds)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="enemy-purger", daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "last_deleted": dict(self._stats["last_deleted"]),
+                "last_dropped_partitions": list(self._stats["last_dropped_partitions"]),
+            }
+
+
+enemy_purger = EnemyPurger()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        deleted = enemy_purger.run_once()
+        print("⏭️ Another purger is running" if deleted is None else f"✅ Purged {deleted}")
+        return
+    print(f"🧹 Purging every {enemy_purger.interval_seconds}s (Ctrl+C to stop)")
+    try:
+        enemy_purger._loop()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import hashlib
+import random
+from collections import defaultdict
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import RiddleBank, UserSeenRiddles
+from enemies.services.answer_matching import normalize_answer, answer_aliases
+from enemies.enums.place_registry import place_info
+from enemies.services.general_riddles import FALLBACK_RIDDLES, generate_riddles_concurrently
+from enemies.services.math_riddles import generate_math_riddles
+from enemies.services.riddle_pool import riddle_pool
+
+# Bank category for the offline riddles, used when nothing else is available
+FALLBACK_CATEGORY = "fallback"
+
+
+def riddle_category(place_type: str) -> str:
+    """
+    The riddle bank category of a place type (its riddle_description).
+    """
+    location_info = place_info(place_type)
+    if location_info is None:
+        return FALLBACK_CATEGORY
+    return location_info.riddle_description
+
+
+# Trimmed off both ends before hashing. ASCII only, so SQL btrim(x, E' \t\n\r\f\x0b')
+# matches it exactly (Python's plain strip() also trims Unicode spaces)
+HASH_TRIM_CHARS = " \t\n\r\f\v"
+
+
+def riddle_content_hash(riddle, answer) -> str:
+    """
+    Dedup key of a riddle: sha256 over the trimmed, lowercased riddle and answer.
+    Must stay in sync with the SQL in the riddle_bank migrations.
+    """
+    text = f"{str(riddle).strip(HASH_TRIM_CHARS).lower()}\n{str(answer).strip(HASH_TRIM_CHARS).lower()}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+### Seen-riddles bitmap
+def bitmap_add(bitmap: bytes, riddle_ids) -> bytes:
+    """
+    Return a copy of the bitmap with the given riddle ids set.
+    The bitmap grows to the largest id, one bit per riddle in the bank: id i is
+    bit i & 7 of byte i >> 3, the layout SQL get_bit() reads (see PROBE_RIDDLES_SQL).
+    """
+    riddle_ids = list(riddle_ids)
+    if not riddle_ids:
+        return bitmap
+    buf = bytearray(bitmap)
+    size = (max(riddle_ids) >> 3) + 1
+    if size > len(buf):
+        buf.extend(bytes(size - len(buf)))
+    for riddle_id in riddle_ids:
+        buf[riddle_id >> 3] |= 1 << (riddle_id & 7)
+    return bytes(buf)
+
+
+def load_seen_bitmap(db: Session, user_id: int, for_update: bool = False) -> bytes | None:
+    """
+    The user's seen bitmap, or None if they have none yet.
+    for_update locks the row until commit, so concurrent spawns can't overwrite each other's bits.
+    """
+    query = db.query(UserSeenRiddles.seen_bitmap).filter(UserSeenRiddles.user_id == user_id)
+    if for_update:
+        query = query.with_for_update()
+    bitmap = query.scalar()
+    return bytes(bitmap) if bitmap is not None else None
+
+
+def mark_riddles_seen(db: Session, user_id: int, riddle_ids):
+    """
+    Set the given riddles as seen by the user (no commit).
+    The current bitmap is re-read under a row lock and the bits merged into it,
+    so concurrent spawns for the same user keep each other's bits.
+    """
+    seen_bitmap = load_seen_bitmap(db, user_id, for_update=True)
+    if seen_bitmap is None:
+        # First riddles for this user. If a concurrent spawn created the row meanwhile,
+        # lock it (waits for that spawn to commit) and merge into it below
+        inserted = db.execute(
+            insert(UserSeenRiddles)
+            .values(user_id=user_id, seen_bitmap=bitmap_add(b"", riddle_ids))
+            .on_conflict_do_nothing(index_elements=[UserSeenRiddles.user_id])
+        ).rowcount
+        if inserted:
+            return
+        seen_bitmap = load_seen_bitmap(db, user_id, for_update=True)
+
+    new_bitmap = bitmap_add(seen_bitmap, riddle_ids)
+    if new_bitmap != seen_bitmap:
+        db.execute(
+            update(UserSeenRiddles)
+            .where(UserSeenRiddles.user_id == user_id)
+            .values(seen_bitmap=new_bitmap)
+        )
+
+
+### Bank access
+def bank_riddles(db: Session, category: str, riddles: list) -> list:
+    """
+    Store riddles in the bank, skipping ones that are already there.
+    The normalized answer and its aliases are computed here, once per riddle.
+    Returns the bank id of every riddle, in the same order (no commit).
+    """
+    if not riddles:
+        return []
+
+    hashes = [riddle_content_hash(r["riddle"], r["answer"]) for r in riddles]
+    rows = {}
+    for h, r in zip(hashes, riddles):
+        rows.setdefault(h, {
+            "category": category,
+            "riddle": str(r["riddle"]),
+            "answer": str(r["answer"]),
+            "answer_normalized": normalize_answer(r["answer"]),
+            "answer_aliases": answer_aliases(r["answer"]),
+            "content_hash": h,
+        })
+
+    db.execute(
+        insert(RiddleBank)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=[RiddleBank.content_hash])
+    )
+    ids = dict(db.execute(
+        select(RiddleBank.content_hash, RiddleBank.id)
+        .where(RiddleBank.content_hash.in_(list(rows)))
+    ).all())
+    return [ids[h] for h in hashes]
+
+
+# Up to :count ids of the category that aren't set in :bitmap, from a random point in its
+# id range onward, wrapping around to the start. Both halves are range scans on
+# ix_riddle_bank_category_id, stopped by the LIMIT, so the cost doesn't grow with the bank.
+# (CASE, not OR: get_bit must not see an id past the end of the bitmap.)
+PROBE_RIDDLES_SQL = text("""
+WITH bounds AS (
+    SELECT min(id) AS lo, max(id) AS hi FROM riddle_bank WHERE category = :category
+),
+start AS (
+    SELECT lo + floor(random() * (hi - lo + 1))::int AS id FROM bounds
+),
+after_start AS (
+    SELECT b.id
+    FROM riddle_bank b
+    WHERE b.category = :category AND b.id >= (SELECT id FROM start)
+      AND CASE WHEN b.id < :bitmap_bits THEN get_bit(:bitmap, b.id) = 0 ELSE true END
+    ORDER BY b.id
+    LIMIT :count
+),
+before_start AS (
+    SELECT b.id
+    FROM riddle_bank b
+    WHERE b.category = :category AND b.id < (SELECT id FROM start)
+      AND CASE WHEN b.id < :bitmap_bits THEN get_bit(:bitmap, b.id) = 0 ELSE true END
+    ORDER BY b.id
+    LIMIT :count
+)
+(SELECT id FROM after_start) UNION ALL (SELECT id FROM before_start)
+LIMIT :count
+""")
+
+
+def probe_riddle_ids(db: Session, category: str, count: int, seen_bitmap: bytes = b"") -> list:
+    """Up to count bank ids of the category that aren't in seen_bitmap (see PROBE_RIDDLES_SQL)."""
+    if count <= 0:
+        return []
+    return db.execute(PROBE_RIDDLES_SQL, {
+        "category": category,
+        "count": count,
+        "bitmap": seen_bitmap,
+        "bitmap_bits": len(seen_bitmap) * 8,
+    }).scalars().all()
+
+
+def _fresh_riddles(category: str, count: int) -> list:
+    """New riddles that are not in the bank yet. Never waits on the LLM."""
+    if category == "math":
+        return generate_math_riddles(count)
+    if category == FALLBACK_CATEGORY:
+        return []
+    return riddle_pool.pop_many(category, count)
+
+
+def bank_fresh_riddles(db: Session, category: str, count: int) -> list:
+    """
+    Grow the bank by up to count new riddles for the category (pool or math
+    generator, never the LLM). Returns their ids (no commit).
+    """
+    return bank_riddles(db, category, _fresh_riddles(category, count))
+
+
+def assign_riddles(db: Session, user_id: int, place_types: list, live: bool = False) -> list:
+    """
+    Pick a riddle bank id for each place type, and mark them as seen by the user.
+    Per category, prefers: unseen bank riddles -> fresh riddles from the pool ->
+    (if live) fresh riddles from the LLM -> repeats -> offline riddles.
+
+    With live=True every category that is still short is fetched from the LLM
+    concurrently, so this may block for about one completion - only use it off
+    the request path. A failed fetch falls back per enemy.
+    Returns the ids in the same order as place_types (no commit).
+    """
+    seen_bitmap = load_seen_bitmap(db, user_id) or b""
+
+    by_category = defaultdict(list)
+    for i, place_type in enumerate(place_types):
+        by_category[riddle_category(place_type)].append(i)
+
+    # 1. Unseen riddles from the bank, then ready ones from the pool
+    picked = {}
+    missing = {}
+    for category, indexes in by_category.items():
+        picked[category] = probe_riddle_ids(db, category, len(indexes), seen_bitmap)
+
+        short = len(indexes) - len(picked[category])
+        if short:
+            picked[category] += bank_riddles(db, category, _fresh_riddles(category, short))
+        short = len(indexes) - len(picked[category])
+        if short and category != FALLBACK_CATEGORY:
+            missing[category] = short
+
+    # 2. Everything still missing, from the LLM in parallel
+    if live and missing:
+        fetched = generate_riddles_concurrently(missing)
+        for category, riddles in fetched.items():
+            picked[category] += bank_riddles(db, category, riddles)
+
+    # 3. Whatever is left: repeat riddles the player has seen, or offline ones
+    riddle_ids = [None] * len(place_types)
+    for category, indexes in by_category.items():
+        ids = picked[category][:len(indexes)]
+        short = len(indexes) - len(ids)
+        if short:
+            repeats = probe_riddle_ids(db, category, short)
+            ids += [repeats[i % len(repeats)] for i in range(short)] if repeats else []
+        short = len(indexes) - len(ids)
+        if short:
+            ids += bank_riddles(db, FALLBACK_CATEGORY, random.choices(FALLBACK_RIDDLES, k=short))
+        for i, riddle_id in zip(indexes, ids):
+            riddle_ids[i] = riddle_id
+
+    mark_riddles_seen(db, user_id, riddle_ids)
+    return riddle_ids
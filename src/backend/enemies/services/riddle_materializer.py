@@ -0,0 +1,61 @@
+import os
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from models import Enemy
+from enemies.services.riddle_bank import assign_riddles
+from enemies.services.shared_world import visible_to
+
+# Whether spawn schedules a background job that picks riddles before the player opens them
+PREMATERIALIZE_RIDDLES = os.getenv("PREMATERIALIZE_RIDDLES", "1") == "1"
+
+
+def materialize_riddles(db: Session, user_id: int, enemy_ids: list, live: bool = False) -> int:
+    """
+    Attach riddles to the user's enemies (or shared ones) that don't have one yet (the "pending" state).
+    Safe to race: a riddle is only attached if the enemy is still pending,
+    so the player's request and the background job can't overwrite each other.
+    live=True lets missing riddles be fetched from the LLM (concurrently, for
+    the whole batch), see assign_riddles().
+    Returns how many enemies got a riddle. Commits.
+    """
+    pending = (
+        db.query(Enemy.id, Enemy.place_type)
+        .filter(
+            Enemy.id.in_(enemy_ids),
+            visible_to(user_id),
+            Enemy.riddle_id.is_(None),
+        )
+        .all()
+    )
+    if not pending:
+        return 0
+
+    riddle_ids = assign_riddles(db, user_id, [place_type for _, place_type in pending], live=live)
+
+    materialized = 0
+    for (enemy_id, _), riddle_id in zip(pending, riddle_ids):
+        result = db.execute(
+            update(Enemy)
+            .where(Enemy.id == enemy_id, Enemy.riddle_id.is_(None))
+            .values(riddle_id=riddle_id)
+        )
+        materialized += result.rowcount
+    db.commit()
+    return materialized
+
+
+def materialize_riddles_in_background(user_id: int, enemy_ids: list):
+    """
+    Background-task entry point: runs after the spawn response was sent,
+    with its own DB session. Nobody waits on it, so it may call the LLM.
+    """
+    db = SessionLocal()
+    try:
+        materialize_riddles(db, user_id, enemy_ids, live=True)
+    except Exception as e:
+        db.rollback()
+        print("⚠️ Riddle materialization failed:", e)
+    finally:
+        db.close()
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from enemies.enums.place_registry import RIDDLE_CATEGORIES
+from enemies.services.general_riddles import generate_riddles
+
+# How many ready riddles we keep per category, and when we start refilling
+RIDDLE_POOL_TARGET = int(os.getenv("RIDDLE_POOL_TARGET", "10"))
+RIDDLE_POOL_LOW_WATER = int(os.getenv("RIDDLE_POOL_LOW_WATER", "3"))
+RIDDLE_POOL_WORKERS = int(os.getenv("RIDDLE_POOL_WORKERS", "2"))
+
+
+class RiddlePool:
+    """
+    Pre-generated riddles, keyed by the riddle_description category of PLACE_TYPES.
+
+    pop() never talks to the LLM: it hands out a ready riddle (a hit) or None (a miss).
+    Whenever a category drops below the low-water mark, a background worker
+    refills it up to the target size with batched completions.
+    """
+
+    def __init__(self, target_size: int = RIDDLE_POOL_TARGET, low_water: int = RIDDLE_POOL_LOW_WATER):
+        self.target_size = target_size
+        self.low_water = low_water
+        self._riddles = defaultdict(deque)
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @staticmethod
+    def categories():
+        """All LLM categories in the catalog (math riddles are generated offline)."""
+        return [category for category in RIDDLE_CATEGORIES if category != "math"]
+
+    def warm(self):
+        """Schedule a refill of every category. Called once on startup."""
+        for category in self.categories():
+            self._schedule_refill(category)
+
+    def pop(self, category: str):
+        """Return a ready riddle for the category, or None if the pool is empty."""
+        riddles = self.pop_many(category, 1)
+        return riddles[0] if riddles else None
+
+    def pop_many(self, category: str, count: int) -> list:
+        """
+        Return up to `count` ready riddles for the category.
+        Every riddle handed out counts as a hit, every missing one as a miss.
+        """
+        with self._lock:
+            riddles = self._riddles[category]
+            taken = [riddles.popleft() for _ in range(min(count, len(riddles)))]
+            self._hits[category] += len(taken)
+            self._misses[category] += count - len(taken)
+            needs_refill = len(riddles) < self.low_water
+        if needs_refill:
+            self._schedule_refill(category)
+        return taken
+
+    def depth(self, category: str) -> int:
+        with self._lock:
+            return len(self._riddles[category])
+
+    def stats(self) -> dict:
+        """Per-category depth and hit/miss counters."""
+        with self._lock:
+            categories = set(self._riddles) | set(self._hits) | set(self._misses)
+            return {
+                category: {
+                    "depth": len(self._riddles[category]),
+                    "hits": self._hits[category],
+                    "misses": self._misses[category],
+                    "refilling": category in self._refilling,
+                }
+                for category in sorted(categories)
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _schedule_refill(self, category: str):
+        with self._lock:
+            if category in self._refilling:
+                return
+            self._refilling.add(category)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=RIDDLE_POOL_WORKERS,
+                    thread_name_prefix="riddle-pool",
+                )
+            executor = self._executor
+        executor.submit(self._refill, category)
+
+    def _refill(self, category: str):
+        try:
+            while (missing := self.target_size - self.depth(category)) > 0:
+                riddles = generate_riddles(category, missing)
+                if not riddles:
+                    # Upstream is failing - stop, the next pop() will retry
+                    break
+                with self._lock:
+                    self._riddles[category].extend(riddles)
+        finally:
+            with self._lock:
+                self._refilling.discard(category)
+
+
+riddle_pool = RiddlePool()
+
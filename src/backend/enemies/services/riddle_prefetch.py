@@ -0,0 +1,61 @@
+"""
+Riddles for several enemies in one request, so the client can prefetch them as
+enemies come into range and opening one doesn't wait on the network.
+"""
+from geoalchemy2 import Geography
+from sqlalchemy import cast, false, func
+from sqlalchemy.orm import Session
+
+from models import Enemy, RiddleBank
+from enemies.services.enemy_rows import ENEMY_ROW_COLUMNS
+from enemies.services.riddle_materializer import materialize_riddles
+from enemies.services.shared_world import defeated_by, visible_to
+from utils.box_point_utils import meters_to_degrees
+
+PREFETCH_MAX_ENEMIES = 50
+
+
+def _riddle_rows(db: Session, user_id: int):
+    """The player's live, unsolved enemies with their riddle (NULL while pending)."""
+    return (
+        db.query(*ENEMY_ROW_COLUMNS[:-1], false().label("defeated"), RiddleBank.riddle, Enemy.riddle_id)
+        .outerjoin(RiddleBank, RiddleBank.id == Enemy.riddle_id)
+        .filter(visible_to(user_id), Enemy.expires_at > func.now(), ~defeated_by(user_id))
+    )
+
+
+def prefetch_riddles(
+    db: Session,
+    user_id: int,
+    enemy_ids: list | None = None,
+    latitude: float | None = None,
+    longitude: float | None = None,
+    radius_m: float = 150,
+) -> list:
+    """
+    Riddles of the given enemies, or of those within radius_m of (latitude, longitude),
+    nearest first; at most PREFETCH_MAX_ENEMIES, solved and expired ones left out.
+    Pending enemies get their riddle first, from the bank and the pool only (the player
+    is waiting, so no LLM call). Returns (id, enemy_type, longitude, latitude,
+    expires_at, defeated, riddle, riddle_id) rows. Commits if riddles were picked.
+    """
+    query = _riddle_rows(db, user_id)
+    if enemy_ids is not None:
+        query = query.filter(Enemy.id.in_(enemy_ids)).order_by(Enemy.id)
+    else:
+        # Bounding box overlap on the GiST index, then the exact meters on geography
+        point = func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
+        delta_lng, delta_lat = meters_to_degrees(latitude, radius_m)
+        query = (
+            query
+            .filter(Enemy.location.op("&&")(func.ST_Expand(point, delta_lng, delta_lat)))
+            .filter(func.ST_DWithin(cast(Enemy.location, Geography(srid=4326)), cast(point, Geography(srid=4326)), radius_m))
+            .order_by(func.ST_Distance(Enemy.location, point))
+        )
+    rows = query.limit(PREFETCH_MAX_ENEMIES).all()
+
+    pending = [row.id for row in rows if row.riddle_id is None]
+    if pending and materialize_riddles(db, user_id, pending, live=False):
+        materialized = {row.id: row for row in _riddle_rows(db, user_id).filter(Enemy.id.in_(pending))}
+        rows = [materialized.get(row.id, row) for row in rows]
+    return [row for row in rows if row.riddle is not None]
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from openai import OpenAI
+
+# --------------------
+# LLM endpoint and limits
+# --------------------
+HF_API_TOKEN = os.getenv("HF_riddle_bot")
+RIDDLE_LLM_BASE_URL = os.getenv("RIDDLE_LLM_BASE_URL", "https://router.huggingface.co/v1")
+RIDDLE_LLM_MODEL = os.getenv("RIDDLE_LLM_MODEL", "openai/gpt-oss-120b:fireworks-ai")
+RIDDLE_LLM_TIMEOUT_S = float(os.getenv("RIDDLE_LLM_TIMEOUT_S", "8"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("RIDDLE_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_S = float(os.getenv("RIDDLE_BREAKER_COOLDOWN_S", "60"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class RiddleProvider:
+    """
+    Long-lived LLM client for riddle generation.
+
+    - One OpenAI client (and its HTTP connection pool) for the whole process
+    - A strict per-call deadline, with no client-side retries
+    - A circuit breaker: after `failure_threshold` consecutive failures every call
+      fails fast for `cooldown_s` seconds, then a single trial call is let through
+    """
+
+    def __init__(
+        self,
+        timeout_s: float = RIDDLE_LLM_TIMEOUT_S,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        cooldown_s: float = BREAKER_COOLDOWN_S,
+    ):
+        self.timeout_s = timeout_s
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self._client = None
+        self._lock = threading.Lock()
+
+        # Breaker state
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+        # Counters
+        self._calls = 0
+        self._failures = 0
+        self._rejected = 0
+        self._last_latency_s = None
+        self._avg_latency_s = None
+        self._max_latency_s = 0.0
+
+    def _get_client(self) -> OpenAI:
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(
+                    base_url=RIDDLE_LLM_BASE_URL,
+                    api_key=HF_API_TOKEN,
+                    timeout=self.timeout_s,
+                    max_retries=0,
+                )
+            return self._client
+
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.cooldown_s:
+            return "open"
+        return "half_open"
+
+    def _before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                self._rejected += 1
+                raise CircuitOpenError("Riddle LLM circuit breaker is open")
+            if state == "half_open":
+                self._trial_in_flight = True
+            self._calls += 1
+
+    def _after_call(self, latency_s: float, ok: bool):
+        with self._lock:
+            self._trial_in_flight = False
+            self._last_latency_s = latency_s
+            self._max_latency_s = max(self._max_latency_s, latency_s)
+            if self._avg_latency_s is None:
+                self._avg_latency_s = latency_s
+            else:
+                # Exponential moving average, recent calls weigh more
+                self._avg_latency_s = 0.8 * self._avg_latency_s + 0.2 * latency_s
+
+            if ok:
+                self._consecutive_failures = 0
+                self._opened_at = None
+                return
+
+            self._failures += 1
+            self._consecutive_failures += 1
+            if self._opened_at is not None or self._consecutive_failures >= self.failure_threshold:
+                # Trip (or re-trip after a failed trial call)
+                self._opened_at = time.monotonic()
+
+    def complete(self, prompt: str, temperature: float = 0.8) -> str:
+        """
+        Send a single chat completion and return the raw text of the reply.
+        Raises CircuitOpenError without touching the network while the breaker is open,
+        and re-raises any upstream error (including timeouts) after recording it.
+        """
+        self._before_call()
+        start = time.monotonic()
+        try:
+            completion = self._get_client().chat.completions.create(
+                model=RIDDLE_LLM_MODEL,
+                temperature=temperature,
+                top_p=0.9,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+            )
+            content = completion.choices[0].message.content
+        except Exception:
+            self._after_call(time.monotonic() - start, ok=False)
+            raise
+        self._after_call(time.monotonic() - start, ok=True)
+        return content
+
+    def stats(self) -> dict:
+        """Breaker state and upstream latency, for the stats endpoint."""
+        with self._lock:
+            return {
+                "state": self._state(),
+                "consecutive_failures": self._consecutive_failures,
+                "calls": self._calls,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "last_latency_s": self._last_latency_s,
+                "avg_latency_s": self._avg_latency_s,
+                "max_latency_s": self._max_latency_s,
+                "timeout_s": self.timeout_s,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+riddle_provider = RiddleProvider()
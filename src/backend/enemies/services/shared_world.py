@@ -0,0 +1,201 @@
+"""
+Shared world mode: enemies belong to a map tile and a time window (epoch),
+not to a player, so everyone walking the same streets meets the same enemies.
+
+- A tile's enemies are generated once per epoch, by whichever spawn gets there
+  first (a world_tiles row is the claim), so writes and riddle generation scale
+  with the active area instead of the number of players.
+- Shared enemies have user_id NULL and are never marked defeated; each player's
+  wins are rows in enemy_defeats.
+"""
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, exists, false, func, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import Enemy, EnemyDefeat, PlayerSpawnState
+from enemies.enums.place_registry import PLACE_REGISTRY
+from enemies.services.enemy_rows import ENEMY_ROW_COLUMNS
+from utils import geohash
+
+# "player": every player has their own enemies (default), "shared": tile-based shared world
+WORLD_MODE = os.getenv("WORLD_MODE", "player")
+SHARED_WORLD = WORLD_MODE == "shared"
+
+SHARED_TILE_PRECISION = int(os.getenv("SHARED_TILE_PRECISION", "6"))  # ~1.2 km x 0.6 km tiles
+SHARED_EPOCH_MINUTES = int(os.getenv("SHARED_EPOCH_MINUTES", "120"))
+SHARED_TILE_MAX_ENEMIES = int(os.getenv("SHARED_TILE_MAX_ENEMIES", "40"))
+SHARED_TILE_PLACE_LIMIT = 200
+SHARED_CANDIDATES_PER_PLACE = 5
+
+_ENEMY_PLACE_TYPES = [t for t, info in PLACE_REGISTRY.items() if info.enemy_type]
+_ENEMY_TYPES = [PLACE_REGISTRY[t].enemy_type for t in _ENEMY_PLACE_TYPES]
+
+# Same shape as SPAWN_SQL (spawn_enemies_sql.py), for a whole tile instead of a player:
+# - claimed: the world_tiles row; only the spawn that inserts it generates the tile,
+#            concurrent ones wait on the primary key and then insert nothing
+# - nearby:  the best-ranked places overlapping the tile, clipped to it
+TILE_SPAWN_SQL = text("""
+WITH claimed AS (
+    INSERT INTO world_tiles (tile_id, epoch) VALUES (:tile_id, :epoch)
+    ON CONFLICT DO NOTHING
+    RETURNING tile_id
+),
+tile AS (
+    SELECT ST_MakeEnvelope(:west, :south, :east, :north, 4326) AS envelope
+),
+enemy_types AS (
+    SELECT * FROM unnest(CAST(:place_types AS text[]), CAST(:enemy_types AS text[]))
+        AS t(place_type, enemy_type)
+),
+nearby AS (
+    SELECT p.place_id, p.primary_type, p.priority_rank, t.enemy_type,
+           ST_Intersection(p.bounding_box, tile.envelope) AS area
+    FROM places p
+    JOIN enemy_types t ON t.place_type = p.primary_type
+    CROSS JOIN tile
+    WHERE p.bounding_box && tile.envelope
+      AND ST_IsValid(p.bounding_box) AND NOT ST_IsEmpty(p.bounding_box)
+    ORDER BY p.priority_rank, p.place_id
+    LIMIT :place_limit
+),
+candidates AS (
+    SELECT n.place_id, n.primary_type, n.priority_rank, n.enemy_type,
+           (ST_Dump(ST_GeneratePoints(n.area, :candidates_per_place))).geom AS location
+    FROM nearby n
+    WHERE ST_Dimension(n.area) = 2 AND NOT ST_IsEmpty(n.area)
+),
+clustered AS (
+    SELECT c.*,
+           ST_ClusterDBSCAN(
+               ST_Scale(c.location, cos(radians(:latitude)), 1.0),
+               eps := :min_distance_m / 111320.0,
+               minpoints := 1
+           ) OVER () AS cluster_id
+    FROM candidates c
+),
+one_per_cluster AS (
+    SELECT DISTINCT ON (cluster_id) *
+    FROM clustered
+    ORDER BY cluster_id, priority_rank, place_id
+),
+one_per_place AS (
+    SELECT DISTINCT ON (place_id) *
+    FROM one_per_cluster
+    ORDER BY place_id
+),
+chosen AS (
+    SELECT *
+    FROM one_per_place
+    ORDER BY priority_rank, place_id
+    LIMIT :max_enemies
+)
+INSERT INTO enemies (enemy_type, location, place_type, expires_at, defeated, user_id, tile_id, epoch)
+SELECT enemy_type, location, primary_type, :expires_at, 0, NULL, :tile_id, :epoch
+FROM chosen
+WHERE EXISTS (SELECT 1 FROM claimed)
+RETURNING id
+""")
+
+
+def current_epoch(now: datetime | None = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    return int(now.timestamp() // (SHARED_EPOCH_MINUTES * 60))
+
+
+def epoch_end(epoch: int) -> datetime:
+    return datetime.fromtimestamp((epoch + 1) * SHARED_EPOCH_MINUTES * 60, tz=timezone.utc)
+
+
+def tile_for(latitude: float, longitude: float) -> str:
+    return geohash.encode(latitude, longitude, SHARED_TILE_PRECISION)
+
+
+def visible_to(user_id: int):
+    """Filter for the enemies a player may see and fight: their own, plus shared ones."""
+    if SHARED_WORLD:
+        return or_(Enemy.user_id == user_id, Enemy.user_id.is_(None))
+    return Enemy.user_id == user_id
+
+
+def defeated_by(user_id: int):
+    """Whether the player has solved the enemy (own enemies: flag, shared ones: enemy_defeats)."""
+    if not SHARED_WORLD:
+        return Enemy.defeated == 1
+    return or_(
+        Enemy.defeated == 1,
+        exists().where(and_(EnemyDefeat.user_id == user_id, EnemyDefeat.enemy_id == Enemy.id)),
+    )
+
+
+def ensure_tile(db: Session, tile_id: str, epoch: int, latitude: float) -> list:
+    """
+    Generate the tile's enemies for this epoch unless someone already did.
+    Returns the ids of the enemies generated by this call (usually none). Commits.
+    """
+    west, south, east, north = geohash.bounds(tile_id)
+    rows = db.execute(TILE_SPAWN_SQL, {
+        "tile_id": tile_id,
+        "epoch": epoch,
+        "west": west,
+        "south": south,
+        "east": east,
+        "north": north,
+        "place_types": _ENEMY_PLACE_TYPES,
+        "enemy_types": _ENEMY_TYPES,
+        "place_limit": SHARED_TILE_PLACE_LIMIT,
+        "candidates_per_place": SHARED_CANDIDATES_PER_PLACE,
+        "latitude": latitude,
+        "min_distance_m": 40,
+        "max_enemies": SHARED_TILE_MAX_ENEMIES,
+        "expires_at": epoch_end(epoch),
+    }).all()
+    db.commit()
+    return [row.id for row in rows]
+
+
+def record_spawn_state(db: Session, user_id: int, tile_id: str, latitude: float, longitude: float):
+    """Remember where the player last spawned (their tile is what the enemy list shows). No commit."""
+    location = func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
+    db.execute(
+        pg_insert(PlayerSpawnState)
+        .values(user_id=user_id, tile_id=tile_id, location=location, spawned_at=func.now())
+        .on_conflict_do_update(
+            index_elements=[PlayerSpawnState.user_id],
+            set_={"tile_id": tile_id, "location": location, "spawned_at": func.now()},
+        )
+    )
+
+
+def visible_enemies(db: Session, user_id: int, tile_id: str | None, epoch: int | None = None):
+    """
+    The live shared enemies of the tile and its neighbours that the player hasn't solved,
+    as (id, enemy_type, longitude, latitude, expires_at, defeated) rows.
+    """
+    if tile_id is None:
+        return []
+    epoch = current_epoch() if epoch is None else epoch
+    return (
+        db.query(*ENEMY_ROW_COLUMNS[:-1], false().label("defeated"))
+        .filter(Enemy.tile_id.in_(geohash.neighbors(tile_id)), Enemy.epoch == epoch)
+        .filter(Enemy.user_id.is_(None))
+        .filter(~defeated_by(user_id))
+        .all()
+    )
+
+
+def spawn_shared(db: Session, user_id: int, latitude: float, longitude: float):
+    """
+    Shared world spawn: make sure the player's tile is populated for this epoch,
+    then return what they can see around it.
+    Returns (visible rows, ids of enemies generated by this call). Commits.
+    """
+    epoch = current_epoch()
+    tile_id = tile_for(latitude, longitude)
+    new_ids = ensure_tile(db, tile_id, epoch, latitude)
+    record_spawn_state(db, user_id, tile_id, latitude, longitude)
+    db.commit()
+    return visible_enemies(db, user_id, tile_id, epoch), new_ids
+
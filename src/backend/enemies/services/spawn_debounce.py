@@ -0,0 +1,78 @@
+"""
+Spawn debouncing: when a player asks to spawn again right after the last spawn,
+from (almost) the same spot, and still has a full set of live enemies,
+spawning again can't add anything, so their current enemies are returned as is.
+"""
+import os
+import threading
+from datetime import timedelta
+
+from sqlalchemy import cast, func
+from geoalchemy2 import Geography
+from sqlalchemy.orm import Session
+
+from models import PlayerSpawnState
+from enemies.services.enemy_rows import active_enemy_rows
+
+SPAWN_DEBOUNCE_M = float(os.getenv("SPAWN_DEBOUNCE_M", "25"))
+SPAWN_DEBOUNCE_SECONDS = int(os.getenv("SPAWN_DEBOUNCE_SECONDS", "60"))
+
+
+class SpawnDebounce:
+    def __init__(self, distance_m: float = SPAWN_DEBOUNCE_M, window_seconds: int = SPAWN_DEBOUNCE_SECONDS):
+        self.distance_m = distance_m
+        self.window_seconds = window_seconds
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def recent_spawn_nearby(self, db: Session, user_id: int, latitude: float, longitude: float) -> bool:
+        """Whether the player's last spawn was within the window and distance."""
+        point = cast(func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326), Geography(srid=4326))
+        return db.query(
+            db.query(PlayerSpawnState.user_id)
+            .filter(
+                PlayerSpawnState.user_id == user_id,
+                PlayerSpawnState.spawned_at > func.now() - timedelta(seconds=self.window_seconds),
+                func.ST_DWithin(cast(PlayerSpawnState.location, Geography(srid=4326)), point, self.distance_m),
+            )
+            .exists()
+        ).scalar()
+
+    def reuse(self, db: Session, user_id: int, latitude: float, longitude: float, max_enemies: int):
+        """
+        The player's live enemies if this spawn can be skipped, else None.
+        Rows are (id, enemy_type, longitude, latitude, expires_at, defeated).
+        """
+        if self.window_seconds <= 0 or not self.recent_spawn_nearby(db, user_id, latitude, longitude):
+            self._count(False)
+            return None
+
+        active = active_enemy_rows(db, user_id, undefeated_only=True)
+        if len(active) < max_enemies:
+            self._count(False)
+            return None
+
+        self._count(True)
+        return active
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "distance_m": self.distance_m,
+                "window_seconds": self.window_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else None,
+            }
+
+
+spawn_debounce = SpawnDebounce()
@@ -1,121 +1,187 @@
-import random
+import math
 from datetime import datetime, timedelta
+import numpy as np
+import shapely
 from shapely.geometry import shape, Point
 from geoalchemy2.shape import from_shape, to_shape
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func, insert
 from sqlalchemy.orm import Session
-from shapely import wkb
 
-from models import Enemy
-from enums.type_priority import TYPE_PRIORITY
-from enemies.enums.type_locations_for_enemies import PLACE_TYPES
-from enemies.services.general_riddles import get_riddle
+from models import Enemy, Place
+from enemies.services.enemy_rows import ENEMY_ROW_COLUMNS, active_enemy_rows
+from enemies.services.enemy_sync import bump_world_version
+from utils.poisson_disk import poisson_disk_sample
+from utils.polygon_sampler import TriangleSampler, sampler_for, triangulate
+from utils.box_point_utils import meters_to_degrees
+from enemies.enums.place_registry import PLACE_REGISTRY
 
 
-def get_enemy_type_for_place(place_type: str):
-    for entry in PLACE_TYPES:
-        if entry["place_type"] == place_type:
-            return entry["enemy_type"]
+# Place types that have an enemy living there
+ENEMY_PLACE_TYPES = tuple(t for t, info in PLACE_REGISTRY.items() if info.enemy_type)
 
 
+def query_nearby_places(db: Session, longitude: float, latitude: float, radius_m: float, limit: int):
+    return nearby_places_query(db, longitude, latitude, radius_m, limit).all()
+
+
+def nearby_places_query(db: Session, longitude: float, latitude: float, radius_m: float, limit: int):
+    """
+    The best-ranked places within radius_m meters of a point that can host an enemy.
+    A bounding box overlap (&&) picks candidates from the GiST index on bounding_box,
+    then ST_DWithin on geography keeps those truly within radius_m.
+    Ordering and the limit run in PostGIS on the indexed priority_rank column,
+    so dense areas don't pull every place into Python.
+    """
+    point = func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
+    delta_lng, delta_lat = meters_to_degrees(latitude, radius_m)
+    return (
+        db.query(Place)
+        .filter(Place.bounding_box.op("&&")(func.ST_Expand(point, delta_lng, delta_lat)))
+        .filter(func.ST_DWithin(cast(Place.bounding_box, Geography(srid=4326)), cast(point, Geography(srid=4326)), radius_m))
+        .filter(Place.primary_type.in_(ENEMY_PLACE_TYPES))
+        .order_by(Place.priority_rank, Place.place_id)
+        .limit(limit)
+    )
+
+
+
+# Meters per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111_320
+
+
+def local_projection(latitude: float, longitude: float):
+    """
+    Equirectangular projection to meters around (latitude, longitude), accurate
+    enough over the few hundred meters a spawn covers.
+    Returns (to_meters, to_degrees) functions for shapely.transform.
+    """
+    x_scale = METERS_PER_DEGREE * math.cos(math.radians(latitude))
+
+    def to_meters(coords):
+        return np.column_stack(((coords[:, 0] - longitude) * x_scale, (coords[:, 1] - latitude) * METERS_PER_DEGREE))
+
+    def to_degrees(coords):
+        return np.column_stack((coords[:, 0] / x_scale + longitude, coords[:, 1] / METERS_PER_DEGREE + latitude))
+
+    return to_meters, to_degrees
+
+
+def _polygonal(geom):
+    """The polygon part of a clipped geometry, or None if nothing with an area is left."""
+    if geom.is_empty or geom.area == 0:
+        return None
+    if geom.geom_type in ("Polygon", "MultiPolygon"):
+        return geom
+    return shapely.union_all([g for g in shapely.get_parts(geom) if g.geom_type == "Polygon"])
+
 
 def spawn_enemies(
     db: Session,
     player,
     nearby_places: list,
+    longitude: float,
+    latitude: float,
     max_enemies: int = 10,
     radius_m: int = 400,
     min_distance_m: int = 40,
     lifespan_hours: int = 2,
 ):
     """
-    Spawn enemies for player:
+    Spawn enemies for player and return the inserted rows (see insert_enemies):
     - One per place, up to max_enemies
     - Prioritized by TYPE_PRIORITY
-    - ≥ min_distance_m apart
+    - Within radius_m of the player at (longitude, latitude)
+    - ≥ min_distance_m apart (Poisson-disk sampling over all places at once,
+      see utils/poisson_disk.py)
+    - Riddles are not picked here: enemies start in the pending-riddle state
+      (see enemies/services/riddle_materializer.py)
     """
 
     # Already existing enemies for this player (to avoid duplicates)
-    existing = (
-        db.query(Enemy)
-        .filter(Enemy.user_id == player.user_id)
-        .filter(Enemy.expires_at > datetime.utcnow())
-        .filter(Enemy.defeated == 0)
-        .all()
-    )
-
-    existing_enemies = [wkb.loads(bytes(e.location.data)) for e in existing]
-
-    # Sort places by TYPE_PRIORITY (lower number = higher priority)
-    TYPE_PRIORITY_RANK = {t: i for i, t in enumerate(TYPE_PRIORITY)}
-
-    def place_priority(place):
-        if not place.place_types:
-            return len(TYPE_PRIORITY_RANK)
-        # Find the best (lowest index) among its types
-        return min(
-            TYPE_PRIORITY_RANK.get(t, len(TYPE_PRIORITY_RANK))
-            for t in place.place_types
-        )
-
-    sorted_places = sorted(nearby_places, key=place_priority)
-
-    spawned = []
-    for place in sorted_places:
-        print ("-----> Debug: going over places. Enemies spawned: ", spawned," Max enemies: ", max_enemies)
-        if len(spawned+existing_enemies) >= max_enemies:
-            break
-
-        place_type = TYPE_PRIORITY[place_priority(place)]
-
-        # Match place_type → enemy_type
-        enemy_type = get_enemy_type_for_place(place_type)
-        if not enemy_type:
-            continue  # skip if no mapping exists
-
-        print("-------> Debug: Enemy type: ",enemy_type)
-
-        # Pick a random point inside place's geometry
+    existing = active_enemy_rows(db, player.user_id, undefeated_only=True)
+    free_slots = max_enemies - len(existing)
+    if free_slots <= 0:
+        return []
+
+    # Places that can host an enemy, best first: nearby_places_query only returns
+    # ENEMY_PLACE_TYPES, ordered by the priority_rank stored on each place
+    candidates = []
+    for place in nearby_places:
+        enemy_type = PLACE_REGISTRY[place.primary_type].enemy_type
         geom = to_shape(place.bounding_box)  # polygon from DB
         if not geom.is_valid or geom.is_empty:
             continue
+        candidates.append((place.priority_rank, place.primary_type, enemy_type, geom))
+
+    # Sample in local meters around the player, so min_distance_m is exact in every direction.
+    # Places are clipped to the radius_m disk: a park or a campus can be kilometers across,
+    # and only the part in reach matters.
+    to_meters, to_degrees = local_projection(latitude, longitude)
+    reach = Point(0, 0).buffer(radius_m)
+    shapely.prepare(reach)
+    kept, regions, samplers = [], [], []
+    for candidate in candidates:
+        region = shapely.transform(candidate[3], to_meters)
+        if reach.contains(region):
+            # Triangulated once (cached by geometry), the projection is affine so draws stay uniform
+            sampler = sampler_for(candidate[3]).transform(to_meters)
+        else:
+            region = _polygonal(region.intersection(reach))
+            if region is None:
+                continue
+            sampler = TriangleSampler(triangulate(region))  # one-off shape, not worth a cache slot
+        kept.append(candidate)
+        regions.append(region)
+        samplers.append(sampler)
+    candidates = kept
+    if not candidates:
+        return []
+    exclusion = [tuple(xy) for xy in to_meters(np.array([(e.longitude, e.latitude) for e in existing]).reshape(-1, 2))]
+
+    # One point for each of the best free_slots places is all that's needed
+    samples = poisson_disk_sample(
+        regions, min_distance_m, exclusion_points=exclusion, samplers=samplers, max_regions=free_slots,
+    )
 
-        # crude rejection-sampling: try random points in bbox until inside
-        minx, miny, maxx, maxy = geom.bounds
-        for _ in range(20):
-            rand_point = Point(
-                random.uniform(minx, maxx),
-                random.uniform(miny, maxy),
-            )
-            if geom.contains(rand_point):
-                # Ensure distance ≥ min_distance_m
-                # Convert 'spawned' locations to Shapely geometries
-                spawned_points = [wkb.loads(bytes(e.location.data)) for e in spawned]
-
-                # Combine all points
-                comparison_points = existing_enemies + spawned_points
-
-                # Compute distances (in meters)
-                distances_m = [rand_point.distance(ep) * 111_000 for ep in comparison_points]
-
-                # Check if all distances are above the threshold
-                if all(d >= min_distance_m for d in distances_m):
-                    new_riddle = get_riddle(place_type)
-
-                    enemy = Enemy(
-                        enemy_type=enemy_type,
-                        location=from_shape(rand_point, srid=4326),
-                        riddle = new_riddle["riddle"],
-                        answer = new_riddle["answer"],
-                        expires_at=datetime.utcnow() + timedelta(hours=lifespan_hours),
-                        user_id=player.user_id,
-                    )
-                    db.add(enemy)
-                    db.flush()  # get ID before refresh
-                    spawned.append(enemy)
-                    break
-
+    # One point per place, best places first (samples of a place come in any order)
+    point_for_place = {}
+    for x, y, index in samples:
+        point_for_place.setdefault(index, (x, y))
+
+    expires_at = datetime.utcnow() + timedelta(hours=lifespan_hours)
+    # The new enemies carry the player's next world version (see enemy_sync.py)
+    version = bump_world_version(db, player.user_id) if point_for_place else None
+    new_enemies = []
+    for index in sorted(point_for_place)[:free_slots]:
+        _, place_type, enemy_type, _ = candidates[index]
+        lng, lat = to_degrees(np.array([point_for_place[index]]))[0]
+        new_enemies.append({
+            "enemy_type": enemy_type,
+            "location": from_shape(Point(float(lng), float(lat)), srid=4326),
+            "place_type": place_type,
+            "expires_at": expires_at,
+            "defeated": 0,
+            "user_id": player.user_id,
+            "version": version,
+        })
+
+    return insert_enemies(db, new_enemies)
+
+
+def insert_enemies(db: Session, new_enemies: list) -> list:
+    """
+    Persist enemies with one INSERT ... RETURNING and commit.
+    new_enemies: dicts of Enemy column values.
+    Returns (id, enemy_type, longitude, latitude, expires_at, defeated) rows,
+    ready for the response, so nothing has to be flushed or refreshed one by one.
+    """
+    if not new_enemies:
+        return []
+    rows = db.execute(
+        insert(Enemy)
+        .values(new_enemies)
+        .returning(*ENEMY_ROW_COLUMNS)
+    ).all()
     db.commit()
-    for e in spawned:
-        db.refresh(e)
-
-    return spawned
+    return rows
@@ -0,0 +1,158 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from enemies.enums.place_registry import PLACE_REGISTRY
+from utils.box_point_utils import meters_to_degrees
+
+# How many random candidate points PostGIS draws inside each place
+CANDIDATES_PER_PLACE = 5
+
+# Place type -> enemy type, passed to the query as two parallel arrays
+_ENEMY_PLACE_TYPES = [t for t, info in PLACE_REGISTRY.items() if info.enemy_type]
+_ENEMY_TYPES = [PLACE_REGISTRY[t].enemy_type for t in _ENEMY_PLACE_TYPES]
+
+# Candidate generation, spacing, the max_enemies cap and the insert, in one statement:
+# - existing:    the player's live enemies (partial index ix_enemies_user_active)
+# - reach:       the radius_m disk around the player, as a polygon
+# - nearby:      the best-ranked places within radius_m that can host an enemy
+#                (&& on the GiST-indexed bounding box, then the exact meter check on geography)
+# - candidates:  ST_GeneratePoints draws random points inside the part of each place in reach
+# - free:        drop candidates closer than min_distance_m to the player's live enemies
+# - clustered:   ST_ClusterDBSCAN with minpoints 1 puts candidates closer than
+#                min_distance_m in the same cluster, so one point per cluster is
+#                always spaced out (longitudes are scaled by cos(lat) to get meters right)
+# - chosen:      best-ranked point per cluster, one per place, up to the free slots
+# - bumped:      the player's next world version, stamped on the new enemies (see enemy_sync.py),
+#                only taken if something spawns
+# - inserted:    the new enemies
+# The result is the inserted rows, each with the number of nearby places; with nothing
+# inserted, a single row of NULLs tells "nothing free" (places > 0) from "no places" (0).
+SPAWN_SQL = text("""
+WITH existing AS (
+    SELECT location
+    FROM enemies
+    WHERE user_id = :user_id AND expires_at > now() AND defeated = 0
+),
+slots AS (
+    SELECT GREATEST(:max_enemies - count(*), 0) AS free FROM existing
+),
+reach AS (
+    SELECT ST_Buffer(ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography, :radius_m)::geometry AS area
+),
+enemy_types AS (
+    SELECT * FROM unnest(CAST(:place_types AS text[]), CAST(:enemy_types AS text[]))
+        AS t(place_type, enemy_type)
+),
+nearby AS (
+    SELECT p.place_id, p.primary_type, p.priority_rank, p.bounding_box, t.enemy_type
+    FROM places p
+    JOIN enemy_types t ON t.place_type = p.primary_type
+    WHERE p.bounding_box && ST_Expand(ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326), :delta_lng, :delta_lat)
+      AND ST_DWithin(p.bounding_box::geography, ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography, :radius_m)
+      AND ST_IsValid(p.bounding_box) AND NOT ST_IsEmpty(p.bounding_box)
+    ORDER BY p.priority_rank, p.place_id
+    LIMIT :place_limit
+),
+reachable AS (
+    SELECT n.place_id, n.primary_type, n.priority_rank, n.enemy_type,
+           ST_CollectionExtract(ST_Intersection(n.bounding_box, reach.area), 3) AS area
+    FROM nearby n, reach
+),
+candidates AS (
+    SELECT r.place_id, r.primary_type, r.priority_rank, r.enemy_type,
+           (ST_Dump(ST_GeneratePoints(r.area, :candidates_per_place))).geom AS location
+    FROM reachable r
+    WHERE NOT ST_IsEmpty(r.area) AND ST_Area(r.area) > 0
+),
+free AS (
+    SELECT c.*
+    FROM candidates c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM existing e
+        WHERE ST_DWithin(e.location::geography, c.location::geography, :min_distance_m)
+    )
+),
+clustered AS (
+    SELECT f.*,
+           ST_ClusterDBSCAN(
+               ST_Scale(f.location, cos(radians(:latitude)), 1.0),
+               eps := :min_distance_m / 111320.0,
+               minpoints := 1
+           ) OVER () AS cluster_id
+    FROM free f
+),
+one_per_cluster AS (
+    SELECT DISTINCT ON (cluster_id) *
+    FROM clustered
+    ORDER BY cluster_id, priority_rank, place_id
+),
+one_per_place AS (
+    SELECT DISTINCT ON (place_id) *
+    FROM one_per_cluster
+    ORDER BY place_id
+),
+chosen AS (
+    SELECT *
+    FROM one_per_place
+    ORDER BY priority_rank, place_id
+    LIMIT (SELECT free FROM slots)
+),
+bumped AS (
+    UPDATE users SET world_version = world_version + 1
+    WHERE user_id = :user_id AND EXISTS (SELECT 1 FROM chosen)
+    RETURNING world_version
+),
+inserted AS (
+    INSERT INTO enemies (enemy_type, location, place_type, expires_at, defeated, user_id, version)
+    SELECT enemy_type, location, primary_type,
+           now() + make_interval(hours => :lifespan_hours), 0, :user_id,
+           (SELECT world_version FROM bumped)
+    FROM chosen
+    RETURNING id, enemy_type, ST_X(location) AS longitude, ST_Y(location) AS latitude, expires_at, defeated
+)
+SELECT i.*, places.found AS nearby_places
+FROM (SELECT count(*) AS found FROM nearby) AS places
+LEFT JOIN inserted i ON true
+""")
+
+
+def spawn_enemies_sql(
+    db: Session,
+    player,
+    longitude: float,
+    latitude: float,
+    radius_m: float = 400,
+    place_limit: int = 50,
+    max_enemies: int = 10,
+    min_distance_m: int = 40,
+    lifespan_hours: int = 2,
+):
+    """
+    Spawn enemies for player in a single round trip (see SPAWN_SQL):
+    - One per place, up to max_enemies (counting the player's live enemies)
+    - Prioritized by TYPE_PRIORITY
+    - ≥ min_distance_m apart, from each other and from live enemies
+    - Within radius_m of the player, even inside places that reach further
+    Returns the inserted rows (id, enemy_type, longitude, latitude, expires_at, defeated),
+    or None if no place around can host an enemy. Commits.
+    """
+    delta_lng, delta_lat = meters_to_degrees(latitude, radius_m)
+    rows = db.execute(SPAWN_SQL, {
+        "user_id": player.user_id,
+        "max_enemies": max_enemies,
+        "place_types": _ENEMY_PLACE_TYPES,
+        "enemy_types": _ENEMY_TYPES,
+        "longitude": longitude,
+        "latitude": latitude,
+        "radius_m": radius_m,
+        "delta_lng": delta_lng,
+        "delta_lat": delta_lat,
+        "place_limit": place_limit,
+        "candidates_per_place": CANDIDATES_PER_PLACE,
+        "min_distance_m": min_distance_m,
+        "lifespan_hours": lifespan_hours,
+    }).all()
+    db.commit()
+    if not rows[0].nearby_places:
+        return None
+    return [row for row in rows if row.id is not None]
@@ -12,6 +12,11 @@ from db import engine, Base, init_postgis, check_schema_sync
 from dependencies import get_db
 from routers import auth, user, location
 from enemies import router as enemies_router
+from enemies.services.riddle_pool import riddle_pool
+from enemies.services.riddle_provider import riddle_provider
+from enemies.services.purge_enemies import ENEMY_PURGER, enemy_purger
+from enemies.services.event_bus import event_bus
+from services.partitions import ensure_partitions
 
 
 # Lifespan handler
@@ -29,9 +34,28 @@ async def lifespan(app: FastAPI):
     else:
         print("✅ Database and models are synced")
 
+    # Daily partitions for today and the next days (the purger keeps adding them;
+    # rows past the last one wait in the DEFAULT partition)
+    with engine.connect() as conn:
+        ensure_partitions(conn)
+
+    # Fill the riddle pool in the background, so spawns don't wait on the LLM
+    riddle_pool.warm()
+
+    # Delete old enemies in the background (or run enemies.services.purge_enemies as a worker)
+    if ENEMY_PURGER:
+        enemy_purger.start()
+
+    # Enemy push channel (with EVENT_BUS=postgres: listen for other workers' events)
+    event_bus.start()
+
     yield  # <-- the app runs while inside this block
 
     # Shutdown (optional cleanup)
+    event_bus.shutdown()
+    enemy_purger.shutdown()
+    riddle_pool.shutdown()
+    riddle_provider.close()
     print("👋 Shutting down")
 
 app = FastAPI(lifespan=lifespan)
@@ -55,6 +79,7 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # the enemy sync sends it back as If-None-Match
 )
 
 app.include_router(user.router)
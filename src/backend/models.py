@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, DECIMAL, TIMESTAMP, func, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DateTime, ForeignKey, DECIMAL, TIMESTAMP, func, ARRAY, LargeBinary, Index, text
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geography, Geometry
 from datetime import datetime
@@ -10,6 +10,7 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     password_hash = Column(String)
     xp_points = Column(Integer, default=0)
+    world_version = Column(BigInteger, nullable=False, server_default=text("0"))  # bumped on every change to the player's enemies, see enemies/services/enemy_sync.py
 
 class Place(Base):
     __tablename__ = "places"
@@ -18,27 +19,90 @@ class Place(Base):
     place_types = Column(ARRAY(String))
     google_place_id = Column(String)
     bounding_box = Column(Geometry("POLYGON", srid=4326))
+    primary_type = Column(String)  # most preferred of place_types (by TYPE_PRIORITY), set on insert
+    priority_rank = Column(Integer, index=True)  # TYPE_PRIORITY index of primary_type, lower = preferred
 
 class LocationHistory(Base):
     __tablename__ = "location_history"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id"))
     location = Column(Geography("POINT", srid=4326))
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, primary_key=True)  # partition key, see services/partitions.py
     user = relationship("User")
 
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
+
+class RiddleBank(Base):
+    __tablename__ = "riddle_bank"
+
+    id = Column(Integer, primary_key=True, index=True)
+    category = Column(String, nullable=False)  # riddle_description from PLACE_TYPES
+    riddle = Column(String, nullable=False)
+    answer = Column(String, nullable=False)
+    answer_normalized = Column(String)  # normalize_answer(answer), precomputed for answer checks
+    answer_aliases = Column(ARRAY(String))  # other accepted (normalized) spellings
+    content_hash = Column(String(64), nullable=False, unique=True)  # sha256 of riddle + answer, for dedup
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_riddle_bank_category_id", "category", "id"),
+    )
+
+class UserSeenRiddles(Base):
+    __tablename__ = "user_seen_riddles"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    seen_bitmap = Column(LargeBinary, nullable=False)  # bit i set = riddle_bank.id i was served to this user
+
 class Enemy(Base):
     __tablename__ = "enemies"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     enemy_type = Column(String, nullable=False)   # e.g. "Troll", "Sphinx"
     location = Column(Geometry("POINT", srid=4326), nullable=False)
-    riddle = Column(String)
-    answer = Column(String)
-    spawn_time = Column(DateTime(timezone=True), server_default=func.now())
+    place_type = Column(String)  # place type it spawned at, decides the riddle category
+    riddle_id = Column(Integer, ForeignKey("riddle_bank.id"))  # NULL = riddle not picked yet
+    spawn_time = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)  # partition key, see services/partitions.py
     expires_at = Column(DateTime(timezone=True), nullable=False)
     defeated = Column(Integer, default=0)  # 0 = active, 1 = solved
-    user_id = Column(Integer, ForeignKey("users.user_id"))  # player-specific
+    user_id = Column(Integer, ForeignKey("users.user_id"))  # player-specific, NULL = shared world enemy
+    tile_id = Column(String)  # shared world: geohash tile it was generated for
+    epoch = Column(Integer)  # shared world: time window it was generated for
+    version = Column(BigInteger)  # player's world_version when it spawned or was defeated
+
+    __table_args__ = (
+        # A player's live enemies (spawn, list, purge)
+        Index("ix_enemies_user_active", "user_id", "expires_at", postgresql_where=text("defeated = 0")),
+        Index("ix_enemies_tile_epoch", "tile_id", "epoch"),
+        # What changed since a client's last sync
+        Index("ix_enemies_user_version", "user_id", "version"),
+        {"postgresql_partition_by": "RANGE (spawn_time)"},
+    )
+
+class EnemyDefeat(Base):
+    """Shared/procedural world: which player solved which enemy (those enemies are never marked defeated)."""
+    __tablename__ = "enemy_defeats"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    enemy_id = Column(BigInteger, primary_key=True)  # no FK: shared enemies are purged on their own schedule, procedural ones are never stored
+    defeated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class WorldTile(Base):
+    """Shared world: a tile's enemies were generated for this epoch (claimed by exactly one spawn)."""
+    __tablename__ = "world_tiles"
+
+    tile_id = Column(String, primary_key=True)
+    epoch = Column(Integer, primary_key=True)
+    spawned_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class PlayerSpawnState(Base):
+    """Where and when a player last spawned."""
+    __tablename__ = "player_spawn_state"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    tile_id = Column(String)
+    location = Column(Geometry("POINT", srid=4326, spatial_index=False))
+    spawned_at = Column(DateTime(timezone=True), server_default=func.now())
 
 #### An older, more comprehensive version
 
@@ -12,22 +12,13 @@ from utils.google_places import find_location_info_from_google
 from utils.box_point_utils import make_bounding_box_schema, make_point_schema, point_schema_to_postgis
 from schemas.location import PlaceQueryOut, PlaceQuery, PlaceCreate
 from dependencies import get_current_user, get_db
-from enums.type_priority import TYPE_PRIORITY
 
 router = APIRouter(prefix="/api/locations", tags=["locations"])
 
 def select_place (candidates: List):
-    candidate_score = []
-    for candidate in candidates:
-        specific_score = 1000
-        for place_type in candidate.place_types:
-            specific_score = min(specific_score, TYPE_PRIORITY.index(place_type))
-        candidate_score.append(specific_score)
-    chosen_type = TYPE_PRIORITY[min(candidate_score)]
-    for candidate in candidates:
-        if chosen_type in candidate.place_types:
-            return candidate
-    return None
+    # The candidate with the most specific (lowest TYPE_PRIORITY rank) type wins
+    ranked = [c for c in candidates if c.primary_type is not None]
+    return min(ranked, key=lambda c: c.priority_rank, default=None)
 
 def insert_places_into_db (db, places):
     for place in places:
@@ -77,7 +68,11 @@ def check_location(
     insert_places_into_db(db, google_places)
 
     # Search the database
-    stmt = select(Place).where(Place.bounding_box.ST_Contains(postgis_point))
+    stmt = (
+        select(Place)
+        .where(Place.bounding_box.ST_Contains(postgis_point))
+        .order_by(Place.priority_rank)
+    )
     found_places = db.execute(stmt).scalars().all()
     place_info = select_place(found_places)
     if place_info:
@@ -5,6 +5,7 @@ from models import Place, LocationHistory
 from utils.google_places import find_location_info_from_google
 from utils.box_point_utils import bbox_schema_to_postgis_polygon
 from schemas.basic_location import PlaceSchema, PointSchema, BoundingBox4Point
+from enemies.enums.place_registry import best_place_type
 
 def find_local_place(db: Session, lat: float, lng: float) -> Place | None:
     return (
@@ -84,9 +85,13 @@ def orm_place_to_schema(place: Place) -> PlaceSchema:
 
 def schema_place_to_orm(place: PlaceSchema) -> Place:
     bbox = bbox_schema_to_postgis_polygon(place.bounding_box)
+    # Rank the place once here, so queries can ORDER BY priority_rank in SQL
+    priority_rank, primary_type = best_place_type(place.place_types)
     return Place(
         name=place.name,
         google_place_id=place.google_place_id,
         place_types=place.place_types,
         bounding_box=bbox,
+        primary_type=primary_type,
+        priority_rank=priority_rank,
     )
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Daily range partitions for the append-only, short-lived tables.
+
+enemies is partitioned by spawn_time and location_history by timestamp, one
+partition per UTC day, named <table>_pYYYYMMDD. Upcoming partitions are created
+ahead of time (app startup, every purge), and retention drops whole partitions
+(DETACH + DROP) instead of deleting rows.
+
+A DEFAULT partition (<table>_default) catches rows no daily partition covers yet,
+e.g. when the app runs without the purger past PARTITION_DAYS_AHEAD, so inserts
+never fail. The next ensure_partitions moves them into their daily partitions.
+"""
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {
+    "enemies": "spawn_time",
+    "location_history": "timestamp",
+}
+
+PARTITION_DAYS_AHEAD = int(os.getenv("PARTITION_DAYS_AHEAD", "3"))
+
+_PARTITION_NAME = re.compile(r"^(?P<table>.+)_p(?P<day>\d{8})$")
+
+
+def partition_name(table: str, day: date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def is_partition(name: str) -> bool:
+    """Whether a table name is one of our partitions, daily or default (they aren't in the models)."""
+    match = _PARTITION_NAME.match(name)
+    if match:
+        return match.group("table") in PARTITIONED_TABLES
+    return any(name == default_partition_name(table) for table in PARTITIONED_TABLES)
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table},
+    ).scalar()
+
+
+def create_partition(conn: Connection, table: str, day: date):
+    """
+    Create the table's partition for one UTC day, unless it exists. Rows the
+    DEFAULT partition holds for that day are moved into it. No commit.
+    """
+    name = partition_name(table, day)
+    if _exists(conn, name):
+        return
+    # "+00" pins the bounds to UTC for timestamptz keys; timestamp keys ignore it
+    start = f"'{day:%Y-%m-%d} 00:00:00+00'"
+    end = f"'{day + timedelta(days=1):%Y-%m-%d} 00:00:00+00'"
+    default = default_partition_name(table)
+    has_default = _exists(conn, default)
+    if has_default:
+        # PostgreSQL refuses the new partition while the default holds rows in its range:
+        # set them aside, create it, then put them back through the parent
+        key = PARTITIONED_TABLES[table]
+        conn.execute(text(
+            f"CREATE TEMP TABLE {name}_moved ON COMMIT DROP AS "
+            f"WITH moved AS (DELETE FROM {default} WHERE {key} >= {start} AND {key} < {end} RETURNING *) "
+            f"SELECT * FROM moved"
+        ))
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ({start}) TO ({end})"))
+    if has_default:
+        conn.execute(text(f"INSERT INTO {table} SELECT * FROM {name}_moved"))
+
+
+def list_partitions(conn: Connection, table: str) -> list:
+    """[(partition name, day)] of the table, oldest first."""
+    rows = conn.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.oid = to_regclass(:table)
+        """),
+        {"table": table},
+    ).scalars()
+    partitions = []
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match and match.group("table") == table:
+            partitions.append((name, datetime.strptime(match.group("day"), "%Y%m%d").date()))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def _default_days(conn: Connection, table: str) -> list:
+    """The UTC days the table's DEFAULT partition has rows for, from its oldest to its newest row."""
+    default = default_partition_name(table)
+    if not _exists(conn, default):
+        return []
+    key = PARTITIONED_TABLES[table]
+    oldest, newest = conn.execute(text(f"SELECT min({key}), max({key}) FROM {default}")).one()
+    if oldest is None:
+        return []
+    first, last = (
+        (t.astimezone(timezone.utc) if t.tzinfo else t).date() for t in (oldest, newest)
+    )
+    return [first + timedelta(days=n) for n in range((last - first).days + 1)]
+
+
+def ensure_partitions(conn: Connection, days_ahead: int = PARTITION_DAYS_AHEAD) -> list:
+    """
+    Make sure every partitioned table has its DEFAULT partition (a database built by
+    create_all has none) and partitions for yesterday, today and the next days_ahead
+    days, and empty the DEFAULT partitions into daily ones.
+    Returns the tables that are partitioned. Commits.
+    """
+    today = datetime.now(timezone.utc).date()
+    partitioned = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue  # not migrated yet
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"))
+        days = {today + timedelta(days=offset) for offset in range(-1, days_ahead + 1)}
+        for day in sorted(days.union(_default_days(conn, table))):
+            create_partition(conn, table, day)
+        partitioned.append(table)
+    conn.commit()
+    return partitioned
+
+
+def drop_partitions_before(conn: Connection, table: str, cutoff: datetime) -> list:
+    """
+    Detach and drop every partition of the table that only holds rows older
+    than cutoff (its whole day ended before it). Returns the dropped names. Commits.
+    """
+    cutoff_day = cutoff.astimezone(timezone.utc).date() if cutoff.tzinfo else cutoff.date()
+    dropped = []
+    for name, day in list_partitions(conn, table):
+        if day + timedelta(days=1) > cutoff_day:
+            break
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        conn.commit()
+        dropped.append(name)
+    return dropped
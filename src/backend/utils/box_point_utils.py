@@ -219,3 +219,22 @@ def point_to_bbox(point: PointSchema, size_m: float = 20.0) -> BoundingBox4Point
         south_west=PointSchema(latitude=south, longitude=west),
         south_east=PointSchema(latitude=south, longitude=east),
     )
+
+
+### Meter radius to degrees
+def meters_to_degrees(latitude: float, meters: float) -> tuple[float, float]:
+    """
+    Degrees of longitude and latitude that cover at least `meters` around a latitude.
+    Meant for bounding box prefilters (ST_Expand + &&) that can use a GiST index,
+    before the exact meter check on geography, so it errs on the large side.
+
+    Returns:
+        (delta_lng, delta_lat)
+    """
+    # A degree of latitude is 110.57 km at the equator (shortest), and longitudes
+    # shrink towards the pole-side edge of the circle
+    delta_lat = meters / 110_574.0
+    edge_lat = min(abs(latitude) + delta_lat, 89.9)
+    delta_lng = meters / (111_320.0 * math.cos(math.radians(edge_lat)))
+    return delta_lng, delta_lat
+
@@ -0,0 +1,102 @@
+"""
+Geohash encoding, used to cut the map into tiles.
+
+A geohash of precision p is a base32 string of 5 * p bits, alternating
+longitude and latitude bisections; nearby points share prefixes.
+Precision 6 tiles are about 1.2 km x 0.6 km, precision 7 about 150 m x 150 m.
+"""
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(latitude: float, longitude: float, precision: int = 6) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                value = value * 2 + 1
+                lng_lo = mid
+            else:
+                value = value * 2
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                value = value * 2 + 1
+                lat_lo = mid
+            else:
+                value = value * 2
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """The tile's (west, south, east, north) in degrees."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for c in geohash:
+        value = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lng_lo, lat_lo, lng_hi, lat_hi
+
+
+def to_int(geohash: str) -> int:
+    """The 5 * len(geohash) bits of the geohash as an integer."""
+    value = 0
+    for c in geohash:
+        value = value * 32 + _DECODE[c]
+    return value
+
+
+def from_int(value: int, precision: int) -> str:
+    """Inverse of to_int."""
+    chars = []
+    for _ in range(precision):
+        value, digit = divmod(value, 32)
+        chars.append(_BASE32[digit])
+    return "".join(reversed(chars))
+
+
+def neighbors(geohash: str) -> List[str]:
+    """The tile itself and its 8 neighbours (fewer at the poles)."""
+    west, south, east, north = bounds(geohash)
+    width, height = east - west, north - south
+    center_lng, center_lat = (west + east) / 2, (south + north) / 2
+
+    tiles = []
+    for d_lat in (-1, 0, 1):
+        lat = center_lat + d_lat * height
+        if not -90 < lat < 90:
+            continue
+        for d_lng in (-1, 0, 1):
+            lng = (center_lng + d_lng * width + 180) % 360 - 180  # wrap around the antimeridian
+            tile = encode(lat, lng, len(geohash))
+            if tile not in tiles:
+                tiles.append(tile)
+    return tiles
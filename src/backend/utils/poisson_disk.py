@@ -0,0 +1,140 @@
+import math
+import numpy as np
+import shapely
+from typing import List, Sequence, Tuple
+
+from utils.polygon_sampler import sampler_for
+
+
+def poisson_disk_sample(
+    regions: Sequence,
+    min_distance: float,
+    exclusion_points: Sequence[Tuple[float, float]] = (),
+    k: int = 30,
+    rng: np.random.Generator | None = None,
+    seed_attempts: int = 30,
+    samplers: Sequence | None = None,
+    max_regions: int | None = None,
+) -> List[Tuple[float, float, int]]:
+    """
+    Bridson's Poisson-disk sampling over the union of several polygons.
+
+    Produces a blue-noise set of points, every two at least min_distance apart,
+    and at least min_distance away from every exclusion point, in one pass.
+    A background grid with cells of min_distance / sqrt(2) holds at most one point
+    per cell, so each candidate is checked against a constant number of neighbours
+    and the total cost is linear in the number of points.
+
+    Callers want a point per region, not a filled area: sampling stops as soon as
+    every region (or max_regions of them) holds a point, so large regions don't
+    cost more than small ones.
+
+    Coordinates must be planar with min_distance in the same unit (e.g. local meters).
+    Regions are given in priority order: every region is seeded, best first,
+    before the sample grows, so small high-priority places are not crowded out.
+
+    Args:
+        regions: shapely polygons, best first
+        min_distance: minimum distance between points
+        exclusion_points: (x, y) points the sample has to stay away from (not returned)
+        k: candidates tried around each active point before it is retired
+        rng: optional numpy Generator
+        seed_attempts: random seed candidates drawn inside each region
+        samplers: optional TriangleSampler per region (see utils/polygon_sampler.py),
+            e.g. cached ones mapped to the regions' coordinates; built from the regions if omitted
+        max_regions: stop once this many regions hold a point (default: all of them)
+
+    Returns:
+        [(x, y, region_index)] where region_index is the best region containing the point
+        that had no point yet (else the best region containing it)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if samplers is None:
+        samplers = [None] * len(regions)
+    indexed_regions = [(i, r) for i, r in enumerate(regions) if r is not None and not r.is_empty]
+    if not indexed_regions:
+        return []
+
+    union = shapely.union_all([r for _, r in indexed_regions])
+    shapely.prepare(union)
+    for _, region in indexed_regions:
+        shapely.prepare(region)
+
+    cell = min_distance / math.sqrt(2)
+    min_distance_sq = min_distance * min_distance
+    grid = {}       # (i, j) -> [(x, y)], one sample point per cell (plus any exclusion points)
+    points = []     # accepted (x, y)
+    owners = []     # region each accepted point is attributed to (-1: none, float error on a border)
+    active = []     # indexes into points
+    covered = set() # regions holding a point
+    target = len(indexed_regions) if max_regions is None else min(max_regions, len(indexed_regions))
+
+    def cell_of(x, y):
+        return int(math.floor(x / cell)), int(math.floor(y / cell))
+
+    def is_free(x, y):
+        ci, cj = cell_of(x, y)
+        for i in range(ci - 2, ci + 3):
+            for j in range(cj - 2, cj + 3):
+                for ox, oy in grid.get((i, j), ()):
+                    if (ox - x) ** 2 + (oy - y) ** 2 < min_distance_sq:
+                        return False
+        return True
+
+    def owner_of(x, y):
+        # The best region containing the point that has none yet, else the best one containing it
+        best = -1
+        for index, region in indexed_regions:
+            if shapely.contains_xy(region, x, y):
+                if index not in covered:
+                    return index
+                if best < 0:
+                    best = index
+        return best
+
+    def accept(x, y):
+        grid.setdefault(cell_of(x, y), []).append((x, y))
+        points.append((x, y))
+        active.append(len(points) - 1)
+        owner = owner_of(x, y)
+        owners.append(owner)
+        if owner >= 0:
+            covered.add(owner)
+
+    # Existing points block their surroundings, but are not part of the sample
+    for x, y in exclusion_points:
+        grid.setdefault(cell_of(x, y), []).append((x, y))
+
+    # 1. One seed per region, in priority order
+    #    Seeds are drawn from the region's triangulation, so they always land inside it
+    for index, region in indexed_regions:
+        if len(covered) >= target:
+            break
+        sampler = samplers[index] or sampler_for(region)
+        for x, y in sampler.sample(seed_attempts, rng):
+            if is_free(x, y):
+                accept(float(x), float(y))
+                break
+
+    # 2. Grow: try k candidates in the annulus [r, 2r] around a random active point,
+    #    until the regions that can still get a point have one
+    while active and len(covered) < target:
+        slot = int(rng.integers(len(active)))
+        px, py = points[active[slot]]
+        angles = rng.uniform(0, 2 * math.pi, k)
+        radii = min_distance * np.sqrt(rng.uniform(1, 4, k))  # uniform over the annulus area
+        xs = px + radii * np.cos(angles)
+        ys = py + radii * np.sin(angles)
+        inside = shapely.contains_xy(union, xs, ys)
+
+        found = False
+        for x, y in zip(xs[inside], ys[inside]):
+            if is_free(x, y):
+                accept(float(x), float(y))
+                found = True
+                break
+        if not found:
+            active[slot] = active[-1]
+            active.pop()
+
+    return [(x, y, owner) for (x, y), owner in zip(points, owners) if owner >= 0]
@@ -0,0 +1,76 @@
+from functools import lru_cache
+import numpy as np
+import shapely
+
+
+class TriangleSampler:
+    """
+    Uniform random points inside a polygon, with no rejection.
+
+    The polygon is split into triangles once; a draw picks a triangle with
+    probability proportional to its area, then a uniform point inside it.
+    Every draw lands inside the polygon, however thin or rotated it is.
+    """
+
+    def __init__(self, triangles: np.ndarray):
+        # triangles: (n, 3, 2) array of vertices
+        self.triangles = triangles
+        a = triangles[:, 1] - triangles[:, 0]
+        b = triangles[:, 2] - triangles[:, 0]
+        areas = np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]) / 2
+        self.area = float(areas.sum())
+        self.cumulative = np.cumsum(areas) / self.area if self.area > 0 else np.ones(len(areas))
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def sample(self, count: int, rng: np.random.Generator | None = None) -> np.ndarray:
+        """count uniform points as a (count, 2) array of (x, y)."""
+        rng = rng if rng is not None else np.random.default_rng()
+        if count <= 0 or not len(self.triangles):
+            return np.empty((0, 2))
+
+        # Pick triangles by area (clip guards against float error in the last cumulative value)
+        picks = np.minimum(np.searchsorted(self.cumulative, rng.random(count)), len(self.triangles) - 1)
+        t = self.triangles[picks]
+
+        # Uniform point in a triangle: sqrt trick on barycentric coordinates
+        r1 = np.sqrt(rng.random(count))[:, None]
+        r2 = rng.random(count)[:, None]
+        return (1 - r1) * t[:, 0] + r1 * (1 - r2) * t[:, 1] + r1 * r2 * t[:, 2]
+
+    def transform(self, transformation) -> "TriangleSampler":
+        """
+        The same triangles mapped through transformation, a function taking and
+        returning an (n, 2) array (as for shapely.transform).
+        Draws stay uniform only for affine maps, e.g. a local meter projection.
+        """
+        vertices = transformation(self.triangles.reshape(-1, 2))
+        return TriangleSampler(np.asarray(vertices, dtype=float).reshape(-1, 3, 2))
+
+
+def triangulate(geom) -> np.ndarray:
+    """Constrained Delaunay triangles of a (multi)polygon, holes respected, as an (n, 3, 2) array."""
+    if geom is None or geom.is_empty:
+        return np.empty((0, 3, 2))
+    triangles = shapely.get_parts(shapely.constrained_delaunay_triangles(geom))
+    if not len(triangles):
+        return np.empty((0, 3, 2))
+    # Each triangle's exterior ring is closed: 4 coordinates, the last repeats the first
+    rings = shapely.get_exterior_ring(triangles)
+    return np.stack([shapely.get_coordinates(ring)[:3] for ring in rings])
+
+
+@lru_cache(maxsize=4096)
+def _sampler_for_wkb(geom_wkb: bytes) -> TriangleSampler:
+    return TriangleSampler(triangulate(shapely.from_wkb(geom_wkb)))
+
+
+def sampler_for(geom) -> TriangleSampler:
+    """Cached sampler for a polygon (keyed by its WKB, so each place is triangulated once)."""
+    return _sampler_for_wkb(shapely.to_wkb(geom))
+
+
+def sample_points(geom, count: int, rng: np.random.Generator | None = None) -> np.ndarray:
+    """count uniform points inside geom, as a (count, 2) array of (x, y)."""
+    return sampler_for(geom).sample(count, rng)
@@ -2,9 +2,11 @@ import React, { useEffect, useRef, useState, useCallback, useContext } from "rea
 import { AuthContext } from "../context/AuthContext";
 import { LocationContext } from "../context/LocationContext";
 import EnemyApproaches from "./EnemyApproaches";
+import { riddleCache, prefetchRiddles } from "./RiddleView";
 
 const API_BASE = process.env.REACT_APP_API_BASE;
 const GMAPS_KEY = process.env.REACT_APP_GOOGLE_MAPS_API_KEY;
+const PREFETCH_RADIUS_M = 150; // riddles of enemies this close are fetched ahead of the tap
 
 function loadGoogleScript(key) {
   return new Promise((resolve, reject) => {
@@ -39,6 +41,17 @@ function distanceMeters(lat1, lon1, lat2, lon2) {
   return R * 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
 }
 
+// Merge a delta sync response into the enemy list
+function applyEnemyChanges(enemies, { added, defeated, expired }) {
+  const gone = new Set(expired);
+  const beaten = new Set(defeated);
+  const fresh = new Set(added.map((e) => e.id));
+  const kept = enemies
+    .filter((e) => !gone.has(e.id) && !fresh.has(e.id))
+    .map((e) => (beaten.has(e.id) ? { ...e, defeated: true } : e));
+  return [...kept, ...added];
+}
+
 export default function MapView() {
   const mapRef = useRef(null);
   const markerRef = useRef(null);       // user location
@@ -47,6 +60,9 @@ export default function MapView() {
   const customMarkersRef = useRef([]);
   const watchIdRef = useRef(null);
   const enemyMarkersRef = useRef([]); // enemy markers on the map
+  const syncRef = useRef({});           // last sync version and ETag
+  const wsRef = useRef(null);           // enemy push channel
+  const prefetchedRef = useRef(new Set()); // enemy ids whose riddle was already requested
   const [approachingEnemy, setApproachingEnemy] = useState(null);
 
   const { accessToken } = useContext(AuthContext);
@@ -59,6 +75,7 @@ export default function MapView() {
   const [gmapLoaded, setGmapLoaded] = useState(false);
   const [enemies, setEnemies] = useState([]);
   const [loadingEnemies, setLoadingEnemies] = useState(false);
+  const [xp, setXp] = useState(null);
 
   // Whenever location updates from the provider, sync it locally
   useEffect(() => {
@@ -224,16 +241,35 @@ useEffect(() => {
 }, [accessToken]);
 
 // --- Function to fetch enemies from backend
+// Delta sync: only what changed since the last version, 304 when nothing did.
+// Shared/procedural worlds have no sync endpoint (404), those get the full list.
 async function fetchEnemies() {
 if (!accessToken) return;
 setLoadingEnemies(true);
 try {
-  const res = await fetch(`${API_BASE}/enemies/`, {
-    headers: { Authorization: `Bearer ${accessToken}` },
-  });
+  const { version, etag, unavailable } = syncRef.current;
+  if (unavailable) {
+    const res = await fetch(`${API_BASE}/enemies/`, {
+      headers: { Authorization: `Bearer ${accessToken}` },
+    });
+    if (!res.ok) throw new Error(await res.text());
+    setEnemies(await res.json());
+    return;
+  }
+
+  const headers = { Authorization: `Bearer ${accessToken}` };
+  if (etag) headers["If-None-Match"] = etag;
+  const since = version ? `?since=${encodeURIComponent(version)}` : "";
+  const res = await fetch(`${API_BASE}/enemies/sync${since}`, { headers, cache: "no-store" });
+  if (res.status === 304) return; // nothing changed
+  if (res.status === 404) {
+    syncRef.current = { unavailable: true };
+    return fetchEnemies();
+  }
   if (!res.ok) throw new Error(await res.text());
   const data = await res.json();
-  setEnemies(data);
+  syncRef.current = { version: data.version, etag: res.headers.get("ETag") };
+  setEnemies((prev) => (data.full ? data.added : applyEnemyChanges(prev, data)));
 } catch (err) {
   console.error("Error fetching enemies:", err);
 } finally {
@@ -295,14 +331,55 @@ enemies.forEach((enemy) => {
 });
 }, [enemies]);
 
-// --- Optional: Auto-refresh enemies every 30s
+// --- Optional: Auto-refresh enemies every 30s (fallback while the push channel is down)
 useEffect(() => {
+syncRef.current = {}; // another player: start over with a full sync
 const interval = setInterval(() => {
+  if (wsRef.current?.readyState === WebSocket.OPEN) return; // changes are pushed
   fetchEnemies();
 }, 30000);
 return () => clearInterval(interval);
 }, [accessToken]);
 
+// --- Push channel: enemy changes and XP as they happen, resuming from the last sync version
+useEffect(() => {
+if (!accessToken || !API_BASE) return;
+let stopped = false;
+let retryMs = 1000;
+let retryTimer = null;
+
+const connect = () => {
+  const since = syncRef.current.version ? `&since=${encodeURIComponent(syncRef.current.version)}` : "";
+  const ws = new WebSocket(
+    `${API_BASE.replace(/^http/, "ws")}/enemies/ws?token=${encodeURIComponent(accessToken)}${since}`
+  );
+  wsRef.current = ws;
+  ws.onopen = () => {
+    retryMs = 1000;
+  };
+  ws.onmessage = (msg) => {
+    const data = JSON.parse(msg.data);
+    if (data.type === "heartbeat") return;
+    if (data.type === "xp") return setXp(data.xp_points);
+    syncRef.current = { version: data.version, etag: null };
+    setEnemies((prev) => (data.full ? data.added : applyEnemyChanges(prev, data)));
+  };
+  ws.onclose = (e) => {
+    wsRef.current = null;
+    if (stopped || e.code === 1008) return; // logged out, or no push on this server: keep polling
+    retryTimer = setTimeout(connect, retryMs);
+    retryMs = Math.min(retryMs * 2, 60000);
+  };
+};
+connect();
+
+return () => {
+  stopped = true;
+  clearTimeout(retryTimer);
+  if (wsRef.current) wsRef.current.close();
+};
+}, [accessToken]);
+
 
 
 // --- Manual lookup
@@ -334,13 +411,36 @@ async function askPlace() {
     }
 }
 
+// Prefetch the riddles of enemies coming into range, in one request
+useEffect(() => {
+    if (!accessToken || !location || enemies.length === 0) return;
+
+    const ids = enemies
+      .filter(
+        (e) =>
+          !e.defeated &&
+          e.location &&
+          !riddleCache.has(e.id) &&
+          !prefetchedRef.current.has(e.id) &&
+          distanceMeters(location.lat, location.lng, e.location.latitude, e.location.longitude) < PREFETCH_RADIUS_M
+      )
+      .map((e) => e.id);
+    if (ids.length === 0) return;
+
+    ids.forEach((id) => prefetchedRef.current.add(id));
+    prefetchRiddles(accessToken, ids).catch((err) => {
+      console.error("Riddle prefetch error:", err);
+      ids.forEach((id) => prefetchedRef.current.delete(id)); // try again on the next move
+    });
+}, [location, enemies, accessToken]);
+
 // Check an approaching enemy
 useEffect(() => {
     if (!location || enemies.length === 0) return;
 
     let found = null;
     for (const e of enemies) {
-      if (!e.location) continue;
+      if (!e.location || e.defeated) continue;
       const dist = distanceMeters(
         location.lat,
         location.lng,
@@ -431,6 +531,7 @@ useEffect(() => {
         ) : (
           <div>Waiting for location…</div>
         )}
+        {xp !== null && <div>⭐ XP: {xp}</div>}
 
         <h3>Place info</h3>
         {placeInfo ? (
@@ -4,6 +4,25 @@ import { AuthContext } from "../context/AuthContext";
 
 const API_BASE = process.env.REACT_APP_API_BASE;
 
+// Riddles fetched ahead of time (MapView prefetches them as enemies come into range)
+export const riddleCache = new Map(); // enemy id -> { riddle, enemy_type }
+
+// Fetch and cache the riddles of several enemies in one request
+export async function prefetchRiddles(accessToken, enemyIds) {
+  const res = await fetch(`${API_BASE}/enemies/riddles`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${accessToken}`,
+    },
+    body: JSON.stringify({ enemy_ids: enemyIds }),
+  });
+  if (!res.ok) throw new Error(await res.text());
+  const enemies = await res.json();
+  enemies.forEach((e) => riddleCache.set(e.id, { riddle: e.riddle, enemy_type: e.enemy_type }));
+  return enemies;
+}
+
 export default function RiddlePage() {
   const { accessToken } = useContext(AuthContext);
   const { enemyId } = useParams();
@@ -23,6 +42,12 @@ export default function RiddlePage() {
 
   useEffect(() => {
     async function loadRiddle() {
+      const cached = riddleCache.get(Number(enemyId));
+      if (cached) {
+        setRiddle(cached.riddle);
+        setEnemyType(cached.enemy_type);
+        return;
+      }
       try {
         const res = await fetch(`${API_BASE}/enemies/${enemyId}/riddle`, {
           headers: { Authorization: `Bearer ${accessToken}` },
@@ -49,6 +74,7 @@ export default function RiddlePage() {
         body: JSON.stringify({ enemy_id: enemyId, answer }),
       });
       const data = await res.json();
+      if (data.success) riddleCache.delete(Number(enemyId));
       setResult(data);
     } catch (err) {
       console.error(err);